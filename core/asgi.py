@@ -14,3 +14,12 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Optionally load the predictor artifacts when the worker starts instead of on the first request
+# (see core/wsgi.py). Scoring itself runs on the thread pool of predictor/async_views.py.
+from django.conf import settings
+
+if settings.PREDICTOR_PRELOAD:
+    from predictor.registry import preload_model
+
+    preload_model()
@@ -131,6 +131,57 @@ DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Local cache of predictor training datasets (content-addressed, see predictor/dataset_cache.py)
+PREDICTOR_DATASET_CACHE_DIR = os.path.join(MEDIA_ROOT, 'datasets')
+
+# Predictor settings
+PREDICTOR_DATASET_URL = os.getenv(
+    'PREDICTOR_DATASET_URL',
+    'https://res.cloudinary.com/djz9qsw5v/raw/upload/v1748064726/base_clientes_w1_fake_gpdjxz.csv'
+)
+
+# Grow the previous forests on appended rows instead of refitting from scratch when the dataset
+# only gained rows since the last run (see predictor/incremental.py).
+PREDICTOR_INCREMENTAL = os.getenv('PREDICTOR_INCREMENTAL', 'True') == 'True'
+
+# Training CSVs of at least this many MB are streamed in chunks into a memory-mapped feature
+# matrix instead of being loaded whole (see predictor/ingest.py). 0 streams every dataset.
+PREDICTOR_CHUNKED_INGEST_MB = float(os.getenv('PREDICTOR_CHUNKED_INGEST_MB', '256'))
+
+# Load the model (and the ML stack) when the WSGI app is created instead of on the first
+# prediction. Enable together with `gunicorn --preload` so forked workers share the pages.
+# Either way the compiled forests are memory-mapped and shared through the page cache, and the
+# pickled sklearn forests are only loaded by a worker that scores a batch above 256 rows.
+PREDICTOR_PRELOAD = os.getenv('PREDICTOR_PRELOAD', 'False') == 'True'
+
+# Serve the pruned forests written by `manage.py export_compact` when a run has them, without
+# loading its pickled estimators (see predictor/compact.py).
+PREDICTOR_SERVE_COMPACT = os.getenv('PREDICTOR_SERVE_COMPACT', 'True') == 'True'
+
+# Unix socket of the inference server (`manage.py run_inference_server`). When set, web workers
+# forward single predictions to it and only score in-process if it does not answer in time.
+PREDICTOR_INFERENCE_SOCKET = os.getenv('PREDICTOR_INFERENCE_SOCKET', '')
+PREDICTOR_INFERENCE_TIMEOUT = float(os.getenv('PREDICTOR_INFERENCE_TIMEOUT', '0.5'))
+
+# Coalesce concurrent single predictions into one vectorized call. Only worth enabling with
+# threaded workers (gunicorn --threads); a sync worker serves one request at a time, so its
+# batches would never hold more than one client. The inference server always batches.
+# A window of 0 ms batches whatever arrived while the previous batch was scored without
+# delaying anyone; a few ms trades latency for bigger batches under load.
+PREDICTOR_MICROBATCH = os.getenv('PREDICTOR_MICROBATCH', 'False') == 'True'
+PREDICTOR_BATCH_WINDOW_MS = float(os.getenv('PREDICTOR_BATCH_WINDOW_MS', '0'))
+PREDICTOR_BATCH_MAX_ROWS = int(os.getenv('PREDICTOR_BATCH_MAX_ROWS', '64'))
+
+# Per-process LRU cache of single predictions, keyed by the client's fields and the model run.
+# Set the size to 0 to disable it.
+PREDICTOR_CACHE_SIZE = int(os.getenv('PREDICTOR_CACHE_SIZE', '4096'))
+PREDICTOR_CACHE_TTL = float(os.getenv('PREDICTOR_CACHE_TTL', '300'))
+
+# Thread pool the /api/async/ views (served by `uvicorn core.asgi:application`) run scoring and
+# database calls on, so the event loop stays free. Requests beyond MAX_PENDING get a 503.
+PREDICTOR_ASYNC_WORKERS = int(os.getenv('PREDICTOR_ASYNC_WORKERS', '4'))
+PREDICTOR_ASYNC_MAX_PENDING = int(os.getenv('PREDICTOR_ASYNC_MAX_PENDING', '256'))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Optionally load the predictor artifacts at import time. With `gunicorn --preload` this runs
+# in the master before it forks, so all workers share the same physical pages. Otherwise the
+# model and the ML libraries are loaded on the first request that needs them.
+from django.conf import settings
+
+if settings.PREDICTOR_PRELOAD:
+    from predictor.registry import preload_model
+
+    preload_model()
@@ -0,0 +1,40 @@
+"""File layout of a run's artifact directory and its version signature.
+
+Standard library only, so web workers that forward predictions to the inference server can
+tell which model version is on disk without importing the ML stack.
+"""
+import os
+import hashlib
+
+ARTIFACT_FILES = {
+    'le': 'label_encoder.pkl',
+    'scaler': 'standard_scaler.pkl',
+    'rf_h': 'rf_holding.pkl',
+    'rf_c': 'rf_churn.pkl',
+    'importances_h': 'importances_holding.pkl',
+}
+# Uncompressed joblib pickle: every node table can be memory-mapped with mmap_mode='r'.
+FOREST_FILE = 'forests.joblib'
+# Pruned forests with compact dtypes and their feature names; served instead of the pickled
+# estimators when present (see ModelBundle).
+COMPACT_FILE = 'forests_compact.joblib'
+# Artifacts that only some runs have; they are part of the signature when present.
+OPTIONAL_FILES = (FOREST_FILE, COMPACT_FILE)
+
+
+def artifact_signature(output_dir):
+    """Cheap signature of the artifact bundle on disk (path, mtime and size of each file)."""
+    signature = [os.path.abspath(output_dir)]
+    for filename in list(ARTIFACT_FILES.values()) + list(OPTIONAL_FILES):
+        path = os.path.join(output_dir, filename)
+        if filename in OPTIONAL_FILES and not os.path.exists(path):
+            continue
+        st = os.stat(path)
+        signature.append((filename, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def signature_version(output_dir, signature):
+    """Model version reported to clients: the run directory and a digest of its signature."""
+    digest = hashlib.sha1(repr(signature).encode()).hexdigest()[:8]
+    return f"{os.path.basename(os.path.normpath(output_dir))}:{digest}"
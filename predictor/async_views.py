@@ -0,0 +1,146 @@
+"""Async versions of the predictor endpoints, served under /api/async/ by the ASGI application.
+
+The views themselves only parse the request and build the response; scoring, CSV parsing and
+every ORM call run on the BoundedExecutor from services.get_offload, so the event loop keeps
+accepting requests while the forests are evaluated. Run with ``uvicorn core.asgi:application``.
+"""
+import json
+import logging
+from functools import wraps
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+from . import services
+from .offload import Saturated
+from .views import NO_MODEL_ERROR, TrainingJobView, check_access
+
+
+logger = logging.getLogger(__name__)
+
+
+class _NoModel(Exception):
+    pass
+
+
+def _db_task(fn):
+    """Give a pool thread the same connection handling as a request thread."""
+    @wraps(fn)
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return run
+
+
+def _latest_run():
+    from .registry import get_latest_run
+    run = get_latest_run()
+    if run is None:
+        raise _NoModel()
+    return run
+
+
+@_db_task
+def _prediction_report(request):
+    from .charts import chart_urls
+    from .constants import SNAPSHOT_SECTIONS
+    from .serializers import PredictionSerializer
+    run = _latest_run()
+    snapshot = run.snapshot
+    sections = {section: getattr(snapshot, section) for section in SNAPSHOT_SECTIONS}
+    return PredictionSerializer({**run.payload, **sections, **chart_urls(run, request)}).data
+
+
+@_db_task
+def _predict(data):
+    return services.predict(data, _latest_run())
+
+
+@_db_task
+def _predict_batch(records=None, file=None):
+    run = _latest_run()
+    if file is not None:
+        records = services.read_csv(file)
+    bundle = services.get_bundle(run.artifacts_dir)
+    return services.predict_batch(records, bundle), bundle.version
+
+
+@_db_task
+def _enqueue_training(request):
+    """Same rules as TrainingJobView: staff only, always on PREDICTOR_DATASET_URL. Returns (status, body)."""
+    from .jobs import enqueue_training
+    from .serializers import TrainingRunSerializer
+    denied = check_access(TrainingJobView, request)
+    if denied is not None:
+        return denied
+    return 202, TrainingRunSerializer(enqueue_training()).data
+
+
+def offloaded(view):
+    """Map the errors of an async view to the JSON responses the sync views return."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        logger.debug(f"Processing {request.method} request for {request.path}")
+        try:
+            return await view(request, *args, **kwargs)
+        except _NoModel:
+            return JsonResponse({'error': NO_MODEL_ERROR}, status=503)
+        except Saturated as e:
+            return JsonResponse({'error': str(e)}, status=503, headers={'Retry-After': '1'})
+        except Exception as e:
+            logger.error(f"Error in {view.__name__} {request.method}: {str(e)}")
+            return JsonResponse({'error': str(e)}, status=500)
+    return wrapper
+
+
+def _json_body(request):
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+@offloaded
+async def predict(request):
+    if request.method == 'GET':
+        return JsonResponse(await services.get_offload().run(_prediction_report, request))
+    data = _json_body(request)
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'Send the client as a JSON object.'}, status=400)
+    result, version = await services.get_offload().run(_predict, data)
+    return JsonResponse(result, headers={'X-Model-Version': version})
+
+
+@csrf_exempt
+@require_POST
+@offloaded
+async def predict_batch(request):
+    if 'file' in request.FILES:
+        job = services.get_offload().run(_predict_batch, file=request.FILES['file'])
+    else:
+        records = _json_body(request)
+        if not isinstance(records, list):
+            return JsonResponse(
+                {'error': 'Send a JSON array of clients or a CSV upload in the "file" field.'}, status=400
+            )
+        job = services.get_offload().run(_predict_batch, records)
+    result, version = await job
+    return JsonResponse(result, safe=False, headers={'X-Model-Version': version})
+
+
+@csrf_exempt
+@require_POST
+@offloaded
+async def train(request):
+    status, body = await services.get_offload().run(_enqueue_training, request)
+    return JsonResponse(body, status=status)
+
+
+@require_GET
+async def model_status(request):
+    return JsonResponse(services.model_status())
@@ -0,0 +1,102 @@
+import time
+import queue
+import threading
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds a caller waits for its batch before giving up, so a stuck scorer cannot hang requests.
+SUBMIT_TIMEOUT = 10.0
+
+
+class _Pending:
+    __slots__ = ('key', 'item', 'done', 'result', 'error')
+
+    def __init__(self, key, item):
+        self.key = key
+        self.item = item
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item requests into batches.
+
+    Callers block in ``submit``; a background thread takes every request already queued and
+    keeps collecting until ``max_batch`` items are waiting or ``window`` seconds have passed
+    since the first one, then calls ``score_batch(key, items)`` once per distinct key. With
+    ``window=0`` nobody waits: requests that arrive while a batch is being scored simply
+    form the next batch, so batches only grow under load. ``score_batch`` returns a list aligned
+    with ``items``; an element that is an exception is raised in the matching caller, and a
+    list of the wrong length fails every caller of the group.
+    """
+
+    def __init__(self, score_batch, max_batch=64, window=0.0):
+        self.score_batch = score_batch
+        self.max_batch = max_batch
+        self.window = window
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='predictor-batcher', daemon=True)
+                    self._thread.start()
+
+    def submit(self, key, item, timeout=SUBMIT_TIMEOUT):
+        self._ensure_started()
+        pending = _Pending(key, item)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError('Timed out waiting for the batch to be scored')
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            groups = {}
+            for pending in batch:
+                groups.setdefault(pending.key, []).append(pending)
+            for key, group in groups.items():
+                try:
+                    results = self.score_batch(key, [p.item for p in group])
+                    if len(results) != len(group):
+                        raise RuntimeError(f"score_batch returned {len(results)} results for {len(group)} items")
+                except Exception as e:
+                    logger.error(f"Batch scoring failed: {str(e)}")
+                    results = [e] * len(group)
+                for pending, result in zip(group, results):
+                    if isinstance(result, Exception):
+                        pending.error = result
+                    else:
+                        pending.result = result
+                    pending.done.set()
+            self.batches += 1
+            self.items += len(batch)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch': self.items / self.batches if self.batches else 0.0,
+        }
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.db import transaction, connections
+from django.urls import reverse
+from .models import TrainingRun
+from .tracing import Tracer, span
+
+
+logger = logging.getLogger(__name__)
+
+CHART_NAMES = ['matriz_holding', 'importancia_holding', 'matriz_churn', 'importancia_churn']
+
+# pyplot keeps global state, so renders are serialized within a process.
+_render_lock = threading.Lock()
+_upload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='predictor-charts')
+# (run id, chart name) of the uploads queued or running; request threads and the upload thread
+# both update it.
+_pending_lock = threading.Lock()
+_pending_uploads = set()
+
+
+def chart_path(run, name):
+    return os.path.join(run.artifacts_dir, 'charts', f"{name}.png")
+
+
+def get_chart(run, name):
+    """Return the local PNG for a chart of this run, rendering it on first access.
+
+    Until the chart has a Cloudinary URL every access queues its upload again, so an upload
+    that failed is retried. The render and upload are recorded as spans of the run, next to
+    those of its training.
+    """
+    path = chart_path(run, name)
+    tracer = Tracer()
+    if os.path.exists(path):
+        schedule_upload(run, name, tracer)
+        return path
+    with _render_lock:
+        if not os.path.exists(path):
+            from .v2churn_predictor import render_chart
+            logger.debug(f"Rendering chart {name} for run {run.id}")
+            with tracer.activate(), span('render_chart', chart=name):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.png')
+                os.close(fd)
+                render_chart(run.payload['charts'][name], tmp_path)
+                os.replace(tmp_path, path)
+    schedule_upload(run, name, tracer)
+    return path
+
+
+def schedule_upload(run, name, tracer=None):
+    """Upload a rendered chart to Cloudinary in the background, unless it has a URL or is queued."""
+    key = (run.id, name)
+    if name in run.chart_urls:
+        return
+    with _pending_lock:
+        if key in _pending_uploads:
+            return
+        _pending_uploads.add(key)
+    _upload_executor.submit(_upload_chart, run.id, name, chart_path(run, name), tracer or Tracer())
+
+
+def _upload_chart(run_id, name, path, tracer):
+    from .v2churn_predictor import upload_image_to_cloudinary
+    try:
+        # The run may have been read before an earlier upload of this chart committed.
+        if name in TrainingRun.objects.values_list('chart_urls', flat=True).get(id=run_id):
+            return
+        with tracer.activate(), span('upload_chart', chart=name):
+            url = upload_image_to_cloudinary(path)
+        with transaction.atomic():
+            run = TrainingRun.objects.select_for_update().get(id=run_id)
+            run.chart_urls[name] = url
+            run.spans = run.spans + _renumbered(tracer.spans, len(run.spans))
+            run.save(update_fields=['chart_urls', 'spans'])
+    except Exception as e:
+        logger.error(f"Failed to upload chart {name} for run {run_id}: {str(e)}")
+    finally:
+        with _pending_lock:
+            _pending_uploads.discard((run_id, name))
+        connections.close_all()
+
+
+def _renumbered(spans, offset):
+    """Shift span ids (and parent references) so the spans can be appended after offset others."""
+    return [
+        {**record, 'id': record['id'] + offset, 'parent': None if record['parent'] is None else record['parent'] + offset}
+        for record in spans
+    ]
+
+
+def chart_urls(run, request):
+    """Cloudinary URL of each chart once uploaded, otherwise the local lazy-rendering endpoint."""
+    if 'charts' not in run.payload:
+        # Runs trained before lazy charts already carry their uploaded URLs in the payload.
+        return {}
+    return {
+        f"{name}_url": run.chart_urls.get(name) or request.build_absolute_uri(
+            reverse('predict-chart', kwargs={'id': run.id, 'name': name})
+        )
+        for name in CHART_NAMES
+    }
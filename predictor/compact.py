@@ -0,0 +1,142 @@
+import numpy as np
+import joblib
+from .forest import MISSING_ARRAY, CompiledForest
+
+
+def prune_tree(tree, max_depth=None, ccp_alpha=0.0):
+    """Return the mask of leaves of a fitted sklearn tree after pruning.
+
+    A pruned node becomes a leaf predicting the class distribution of its samples. Nodes at
+    max_depth are pruned, then minimal cost-complexity pruning (sklearn's ``ccp_alpha``) keeps
+    a subtree only if it lowers the weighted impurity by more than ccp_alpha per extra leaf.
+    """
+    left, right = tree.children_left, tree.children_right
+    depth = np.zeros(tree.node_count, dtype=np.int64)
+    order, stack = [], [0]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if left[node] != -1:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+            stack.extend((right[node], left[node]))
+
+    pruned = left == -1
+    if max_depth is not None:
+        pruned = pruned | (depth >= max_depth)
+    if ccp_alpha > 0:
+        weights = tree.weighted_n_node_samples
+        risk = weights / weights[0] * tree.impurity
+        # Cost of the best subtree rooted at each node: its risk plus ccp_alpha per leaf.
+        cost = np.empty(tree.node_count)
+        for node in reversed(order):
+            as_leaf = risk[node] + ccp_alpha
+            if pruned[node] or as_leaf <= cost[left[node]] + cost[right[node]]:
+                pruned[node] = True
+                cost[node] = as_leaf
+            else:
+                cost[node] = cost[left[node]] + cost[right[node]]
+    return pruned
+
+
+def compact_forest(rf, max_depth=None, ccp_alpha=0.0):
+    """Prune every tree of a fitted forest and flatten it like compile_forest, with compact dtypes.
+
+    Thresholds are stored as the largest float32 not above the float64 split value, which
+    sends every float32 input (what sklearn compares) the same way. Node indices and feature
+    ids use the smallest unsigned type that fits, leaf values float32.
+    """
+    features, thresholds, children, leaves, values, roots, depths, missing = [], [], [], [], [], [], [], []
+    offset = 0
+    for estimator in rf.estimators_:
+        tree = estimator.tree_
+        pruned = prune_tree(tree, max_depth, ccp_alpha)
+
+        # Keep the nodes still reachable from the root, in preorder.
+        kept, depth, stack = [], {0: 0}, [0]
+        while stack:
+            node = stack.pop()
+            kept.append(node)
+            if not pruned[node]:
+                depth[tree.children_left[node]] = depth[tree.children_right[node]] = depth[node] + 1
+                stack.extend((tree.children_right[node], tree.children_left[node]))
+        kept = np.asarray(kept)
+        index = np.full(tree.node_count, -1, dtype=np.int64)
+        index[kept] = np.arange(len(kept)) + offset
+
+        is_leaf = pruned[kept]
+        own = np.arange(len(kept)) + offset
+        left = np.where(is_leaf, own, index[np.where(is_leaf, kept, tree.children_left[kept])])
+        right = np.where(is_leaf, own, index[np.where(is_leaf, kept, tree.children_right[kept])])
+
+        value = tree.value[kept, 0, :rf.n_classes_].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        value /= normalizer
+
+        threshold = tree.threshold[kept]
+        threshold32 = threshold.astype(np.float32)
+        above = threshold32.astype(np.float64) > threshold
+        threshold32[above] = np.nextafter(threshold32[above], np.float32(-np.inf))
+
+        missing.append(tree.missing_go_to_left[kept].astype(bool))
+        features.append(np.where(is_leaf, 0, tree.feature[kept]))
+        thresholds.append(threshold32)
+        children.append(np.stack([left, right], axis=1).ravel())
+        leaves.append(is_leaf)
+        values.append(value)
+        roots.append(offset)
+        depths.append(max(depth[node] for node in kept))
+        offset += len(kept)
+
+    index_type = np.min_scalar_type(offset - 1)
+    return {
+        'feature': np.concatenate(features).astype(np.min_scalar_type(rf.n_features_in_ - 1)),
+        'threshold': np.concatenate(thresholds),
+        'children': np.concatenate(children).astype(index_type),
+        'is_leaf': np.concatenate(leaves),
+        'value': np.ascontiguousarray(np.concatenate(values), dtype=np.float32),
+        'roots': np.asarray(roots, dtype=index_type),
+        'classes': np.asarray(rf.classes_),
+        'depth': np.asarray(max(depths), dtype=np.int32),
+        MISSING_ARRAY: np.concatenate(missing),
+    }
+
+
+def holdout_report(rf, compact, X_test, y_test, average='binary'):
+    """Accuracy and F1 of the original and the compact forest on held-out rows, with their sizes."""
+    from sklearn.metrics import accuracy_score, f1_score
+    prob = rf.predict_proba(X_test)
+    compact_prob = CompiledForest(compact).predict_proba(np.asarray(X_test, dtype=np.float64))
+    pred = rf.classes_[prob.argmax(axis=1)]
+    compact_pred = compact['classes'][compact_prob.argmax(axis=1)]
+    report = {}
+    for metric, score in (('accuracy', accuracy_score),
+                          ('f1', lambda y, p: f1_score(y, p, average=average, zero_division=0))):
+        original, pruned = float(score(y_test, pred)), float(score(y_test, compact_pred))
+        report[metric] = {'original': original, 'compact': pruned, 'delta': pruned - original}
+    report['max_proba_diff'] = float(np.abs(prob - compact_prob).max()) if len(prob) else 0.0
+    report['nodes'] = {
+        'original': int(sum(e.tree_.node_count for e in rf.estimators_)),
+        'compact': int(len(compact['is_leaf'])),
+    }
+    report['depth'] = {
+        'original': int(max(e.tree_.max_depth for e in rf.estimators_)),
+        'compact': int(compact['depth']),
+    }
+    return report
+
+
+def save_compact_model(forests, feature_names, report, path):
+    """Store compact forests with what serving needs besides the encoder and scaler."""
+    joblib.dump({
+        'forests': {name: dict(arrays) for name, arrays in forests.items()},
+        'feature_names': list(feature_names),
+        'report': report,
+    }, path)
+
+
+def load_compact_model(path, mmap_mode='r'):
+    """Return (forests, feature_names, report) from a file written by save_compact_model."""
+    data = joblib.load(path, mmap_mode=mmap_mode)
+    forests = {name: CompiledForest(arrays) for name, arrays in data['forests'].items()}
+    return forests, data['feature_names'], data['report']
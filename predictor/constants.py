@@ -0,0 +1,8 @@
+# Stages reported by run_predictor through its on_stage callback, in order. Both forests are
+# fitted concurrently, so they share one 'fit' stage (the run's spans time each target). There
+# is no plots/upload stage: charts are rendered on first access and uploaded in the background
+# (see charts.py); 'export' writes and verifies the compiled forests.
+TRAINING_STAGES = ['download', 'preprocess', 'fit', 'export']
+
+# Payload sections materialized into MetricsSnapshot, one per dashboard endpoint.
+SNAPSHOT_SECTIONS = ['metrics', 'performance', 'stats']
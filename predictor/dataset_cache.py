@@ -0,0 +1,128 @@
+import os
+import json
+import hashlib
+import tempfile
+import logging
+from datetime import datetime, timezone
+import requests
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 20
+
+# Pinned dtypes for the training CSV; anything else (e.g. Id) is inferred.
+DATASET_DTYPES = {
+    'Idade': 'float32',
+    'Volume_Investimentos': 'float32',
+    'Qtd_Servicos_Contratados': 'float32',
+    'Score_Relacionamento': 'float32',
+    'Perfil_Risco': 'category',
+    'Abriu_Holding': 'int8',
+    'Risco_Churn': 'int8',
+}
+
+
+def _index_path(cache_dir, url):
+    return os.path.join(cache_dir, f"{hashlib.sha256(url.encode()).hexdigest()}.json")
+
+
+def _load_entry(cache_dir, url):
+    """Return the cached entry for url if both its index and content file exist."""
+    try:
+        with open(_index_path(cache_dir, url)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if os.path.exists(entry.get('path', '')) else None
+
+
+def _write_json_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def fetch_dataset(url, cache_dir=None, timeout=30):
+    """Return a local path for url, downloading only when the remote copy changed.
+
+    Content is stored as ``<sha256>.csv`` and a per-URL index keeps the ETag/Last-Modified
+    used for conditional GETs. When the remote is unreachable the last cached copy is used.
+    ``cache_dir`` defaults to PREDICTOR_DATASET_CACHE_DIR, under MEDIA_ROOT.
+    """
+    if cache_dir is None:
+        from django.conf import settings
+        cache_dir = settings.PREDICTOR_DATASET_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = _load_entry(cache_dir, url)
+
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 304 and entry:
+                logger.debug(f"Dataset not modified, using cached {entry['sha256']}")
+                return entry['path']
+            response.raise_for_status()
+
+            digest = hashlib.sha256()
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        digest.update(chunk)
+                        f.write(chunk)
+                path = os.path.join(cache_dir, f"{digest.hexdigest()}.csv")
+                os.replace(tmp_path, path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+
+            entry = {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'sha256': digest.hexdigest(),
+                'path': path,
+                'fetched_at': datetime.now(timezone.utc).isoformat(),
+            }
+            _write_json_atomic(_index_path(cache_dir, url), entry)
+            logger.debug(f"Downloaded dataset {entry['sha256']}")
+            return path
+    except requests.RequestException as e:
+        if entry:
+            logger.warning(f"Dataset source unreachable ({str(e)}), using cached {entry['sha256']}")
+            return entry['path']
+        raise
+
+
+def snapshot_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.feather'
+
+
+def read_dataset(csv_path):
+    """Read a cached CSV through its typed Feather snapshot, creating the snapshot on first use.
+
+    Cached CSVs are content-addressed, so a snapshot never goes stale.
+    """
+    path = snapshot_path(csv_path)
+    if os.path.exists(path):
+        return pd.read_feather(path)
+
+    logger.debug(f"Creating columnar snapshot {path}")
+    df = pd.read_csv(csv_path, dtype=DATASET_DTYPES)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        df.to_feather(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return df
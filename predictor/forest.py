@@ -0,0 +1,130 @@
+import numpy as np
+import joblib
+
+NODE_ARRAYS = ('feature', 'threshold', 'children', 'is_leaf', 'value', 'roots')
+FOREST_ARRAYS = NODE_ARRAYS + ('classes', 'depth')
+# Per-node side a missing (NaN) value takes, as sklearn's tree_.missing_go_to_left. Forests
+# compiled before it was stored do not have it and reject NaN inputs instead.
+MISSING_ARRAY = 'missing_left'
+
+
+def compile_forest(rf):
+    """Flatten a fitted RandomForestClassifier into contiguous node tables.
+
+    Nodes of every tree are concatenated and child indices are global; ``children`` holds
+    the (left, right) pair of node ``i`` at positions ``2 * i`` and ``2 * i + 1`` and leaves
+    point to themselves. Leaf values are stored already normalized, exactly as
+    ``DecisionTreeClassifier.predict_proba`` computes them. NaN features follow
+    ``missing_left`` (the child that saw more samples when the tree was fitted without NaNs).
+    """
+    features, thresholds, children, leaves, values, roots, missing = [], [], [], [], [], [], []
+    offset = 0
+    for estimator in rf.estimators_:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        left = np.where(is_leaf, nodes, tree.children_left) + offset
+        right = np.where(is_leaf, nodes, tree.children_right) + offset
+        feature = np.where(is_leaf, 0, tree.feature)
+
+        value = tree.value[:, 0, :rf.n_classes_].copy()
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        value /= normalizer
+
+        features.append(feature)
+        thresholds.append(tree.threshold)
+        children.append(np.stack([left, right], axis=1).ravel())
+        leaves.append(is_leaf)
+        values.append(value)
+        roots.append(offset)
+        missing.append(tree.missing_go_to_left.astype(bool))
+        offset += tree.node_count
+
+    return {
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'children': np.concatenate(children).astype(np.int32),
+        'is_leaf': np.concatenate(leaves),
+        'value': np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'classes': np.asarray(rf.classes_),
+        'depth': np.asarray(max(e.tree_.max_depth for e in rf.estimators_), dtype=np.int32),
+        MISSING_ARRAY: np.concatenate(missing),
+    }
+
+
+class CompiledForest:
+    """Vectorized evaluator over the flat node tables produced by compile_forest."""
+
+    def __init__(self, arrays, chunk_size=1024):
+        for name in FOREST_ARRAYS:
+            setattr(self, name, arrays[name])
+        self.missing_left = arrays.get(MISSING_ARRAY)
+        self.classes_ = self.classes
+        self.depth = int(self.depth)
+        self.chunk_size = chunk_size
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        nbytes = sum(getattr(self, name).nbytes for name in NODE_ARRAYS)
+        return nbytes + (self.missing_left.nbytes if self.missing_left is not None else 0)
+
+    def apply(self, X):
+        """Return the leaf index reached in every tree, shape (n_samples, n_trees)."""
+        # Trees are trained on float32 inputs; compare the same rounded values sklearn does.
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_samples, n_features = X.shape
+        flat_X = X.ravel()
+        has_missing = bool(np.isnan(flat_X).any())
+        if has_missing and self.missing_left is None:
+            raise ValueError("Input contains NaN; retrain the model to score clients with missing values")
+
+        # One slot per (sample, tree) pair; only pairs that have not reached a leaf are advanced.
+        # Node ids may be stored in a narrow type (see compact.py); walk them as intp.
+        nodes = np.tile(self.roots.astype(np.intp), n_samples)
+        row_offset = np.repeat(np.arange(n_samples) * n_features, self.n_trees)
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.size:
+            current = nodes[active]
+            values = flat_X[row_offset[active] + self.feature[current]]
+            go_right = values > self.threshold[current]
+            if has_missing:
+                nan = np.isnan(values)
+                go_right[nan] = ~self.missing_left[current[nan]]
+            nxt = self.children[2 * current + go_right]
+            nodes[active] = nxt
+            active = active[~self.is_leaf[nxt]]
+        return nodes.reshape(n_samples, self.n_trees)
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        proba = np.zeros((X.shape[0], self.value.shape[1]), dtype=np.float64)
+        for start in range(0, X.shape[0], self.chunk_size):
+            leaves = self.apply(X[start:start + self.chunk_size])
+            out = proba[start:start + self.chunk_size]
+            # Accumulate tree by tree, in the same order as RandomForestClassifier, so the
+            # floating point sum is identical to predict_proba.
+            for t in range(self.n_trees):
+                out += self.value[leaves[:, t]]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def save_compiled_forests(forests, path):
+    """Store several compiled forests in one uncompressed file, keyed by name."""
+    joblib.dump({name: dict(compiled) for name, compiled in forests.items()}, path)
+
+
+def load_compiled_forests(path, mmap_mode='r'):
+    """Load compiled forests; with mmap_mode the node tables stay in the shared page cache."""
+    data = joblib.load(path, mmap_mode=mmap_mode)
+    return {name: CompiledForest(arrays) for name, arrays in data.items()}
@@ -0,0 +1,95 @@
+import os
+import hashlib
+import joblib
+import numpy as np
+import pandas as pd
+
+# Trees grown by a full refit with RandomForestClassifier's default n_estimators.
+BASE_TREES = 100
+# Windowed refit policy: once the rows appended since the last full refit exceed this fraction of
+# the rows that refit saw, the forest is refitted from scratch (and the scaler/encoder with it).
+MAX_DELTA_FRACTION = 0.5
+DELTA_TEST_SIZE = 0.2
+# Row indices no tree of the run was trained on; the evaluation set of the next incremental run.
+HOLDOUT_FILE = 'holdout.npy'
+MODEL_FILES = ('label_encoder.pkl', 'standard_scaler.pkl', 'rf_holding.pkl', 'rf_churn.pkl', HOLDOUT_FILE)
+TARGETS = ('Abriu_Holding', 'Risco_Churn')
+
+
+def row_hashes(df):
+    return pd.util.hash_pandas_object(df, index=False).values
+
+
+def fingerprint_rows(hashes, block=1 << 20):
+    # Hashed in slices so memory-mapped hashes (see ingest.py) are never copied whole.
+    digest = hashlib.sha256()
+    for start in range(0, len(hashes), block):
+        digest.update(np.ascontiguousarray(hashes[start:start + block]).tobytes())
+    return digest.hexdigest()
+
+
+class DatasetUnchanged(Exception):
+    """The dataset is the latest run's, row for row; there is nothing new to train on."""
+
+
+def split_delta(n_prev, n_rows, random_state=42):
+    """Split the appended rows [n_prev, n_rows) into (train, test) dataset indices."""
+    permutation = n_prev + np.random.RandomState(random_state).permutation(n_rows - n_prev)
+    n_test = int(np.ceil(DELTA_TEST_SIZE * len(permutation)))
+    return np.sort(permutation[n_test:]), np.sort(permutation[:n_test])
+
+
+def plan_training(df, hashes, previous=None, full_refit_reason=None):
+    """Decide between a full refit and growing the previous forests on the appended rows.
+
+    ``previous`` describes the latest committed run (artifacts_dir, dataset_fingerprint, n_rows,
+    base_rows and, for tuned forests, base_trees). Incremental training needs the new dataset
+    to be the previous one with rows appended, detected by comparing the fingerprint of its
+    first n_rows rows. New trees are proportional to the appended rows; when that rounds to
+    none, or the rows lack a class, no tree is grown and they are all held out. Returns a dict
+    with ``mode`` ('full', 'incremental' or 'unchanged' when no row was appended) and, for full
+    refits, the ``reason``.
+    """
+    n_rows = len(df)
+
+    def full(reason):
+        return {'mode': 'full', 'reason': reason, 'n_rows': n_rows, 'base_rows': n_rows}
+
+    if full_refit_reason:
+        return full(full_refit_reason)
+    if previous is None:
+        return full('no_previous_model')
+    n_prev, base_rows = previous.get('n_rows'), previous.get('base_rows')
+    if not n_prev or not base_rows:
+        return full('previous_run_untracked')
+    if n_rows == n_prev and fingerprint_rows(hashes) == previous['dataset_fingerprint']:
+        return {'mode': 'unchanged', 'reason': 'no_new_rows', 'n_rows': n_rows, 'base_rows': base_rows}
+    if n_rows < n_prev or fingerprint_rows(hashes[:n_prev]) != previous['dataset_fingerprint']:
+        return full('dataset_changed')
+    if n_rows - base_rows > MAX_DELTA_FRACTION * base_rows:
+        return full('refit_window_exceeded')
+
+    previous_dir = previous['artifacts_dir']
+    if not all(os.path.exists(os.path.join(previous_dir, name)) for name in MODEL_FILES):
+        return full('previous_artifacts_missing')
+    le = joblib.load(os.path.join(previous_dir, 'label_encoder.pkl'))
+    if not set(df['Perfil_Risco'].iloc[n_prev:].dropna().unique()) <= set(le.classes_):
+        return full('unseen_categories')
+
+    n_new_trees = round((previous.get('base_trees') or BASE_TREES) * (n_rows - n_prev) / base_rows)
+    train, test = split_delta(n_prev, n_rows)
+    # warm_start re-derives classes_ from the new rows, so every class must be present.
+    if n_new_trees == 0 or any(df[target].iloc[train].nunique() < 2 for target in TARGETS):
+        n_new_trees = 0
+        train, test = np.arange(n_prev, n_prev), np.arange(n_prev, n_rows)
+
+    return {
+        'mode': 'incremental',
+        'reason': '',
+        'n_rows': n_rows,
+        'base_rows': base_rows,
+        'previous_dir': previous_dir,
+        'train': train,
+        'test': np.concatenate([np.load(os.path.join(previous_dir, HOLDOUT_FILE)), test]),
+        'n_new_trees': n_new_trees,
+    }
@@ -0,0 +1,136 @@
+import copy
+import threading
+import numpy as np
+
+# Above this many rows sklearn's compiled tree walk beats the NumPy evaluator.
+COMPILED_MAX_ROWS = 256
+
+
+def format_prediction(pred_h, prob_h, pred_c, prob_c, feature_importance):
+    """Build the per-client response returned by the prediction endpoints."""
+    return {
+        'abriu_holding': 'Sim' if pred_h == 1 else 'Não',
+        'risco_churn': {0: 'Baixo', 1: 'Médio'}[pred_c],
+        'probabilidades': {
+            'holding_sim': prob_h[1] * 100,
+            'holding_nao': prob_h[0] * 100,
+            'churn_medio': prob_c[1] * 100,
+            'churn_baixo': prob_c[0] * 100,
+        },
+        'feature_importance': feature_importance
+    }
+
+
+def _as_float(value):
+    """Numeric feature value; None and '' are missing values (NaN), as pandas reads them."""
+    return np.nan if value is None or value == '' else float(value)
+
+
+def _without_feature_names(rf):
+    """Shallow copy of a fitted forest that accepts plain arrays without the feature-name warning."""
+    rf = copy.copy(rf)
+    if hasattr(rf, 'feature_names_in_'):
+        del rf.feature_names_in_
+    return rf
+
+
+class InferenceEngine:
+    """Precomputed encoder/scaler arrays and forests for scoring clients without pandas."""
+
+    def __init__(self, bundle):
+        self.feature_names = list(bundle.feature_names)
+        self.encoding = {label: code for code, label in enumerate(bundle.le.classes_)}
+        self.perfil_index = self.feature_names.index('Perfil_Risco')
+
+        scaler = bundle.scaler
+        self.numeric_index = np.array([self.feature_names.index(c) for c in scaler.feature_names_in_])
+        self.mean = np.asarray(scaler.mean_, dtype=np.float64)
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        # The sklearn estimators are loaded on first use; compact bundles have none and always
+        # use the compiled forests.
+        self.compact = bundle.compact
+        self._load_estimators = bundle.load_estimators
+        self._estimators = None
+        self._lock = threading.Lock()
+        self.forests = bundle.forests
+        rf_h, rf_c = (None, None) if self.forests else self.estimators()
+        self.classes_h = self.forests['holding'].classes_ if self.forests else rf_h.classes_
+        self.classes_c = self.forests['churn'].classes_ if self.forests else rf_c.classes_
+        self.feature_importance = [{'feature': k, 'importance': v} for k, v in bundle.importances_h.items()]
+
+    def build_row(self, data):
+        """Assemble the scaled feature vector in training column order."""
+        row = np.empty((1, len(self.feature_names)), dtype=np.float64)
+        for i, name in enumerate(self.feature_names):
+            value = data[name]
+            if i == self.perfil_index:
+                if value not in self.encoding:
+                    raise ValueError(f"y contains previously unseen labels: {value!r}")
+                row[0, i] = self.encoding[value]
+            else:
+                row[0, i] = _as_float(value)
+        row[0, self.numeric_index] = (row[0, self.numeric_index] - self.mean) / self.scale
+        return row
+
+    def build_matrix(self, records):
+        """Vectorized build_row for many clients; raises ValueError on unseen Perfil_Risco labels."""
+        X = np.empty((len(records), len(self.feature_names)), dtype=np.float64)
+        for i, name in enumerate(self.feature_names):
+            values = [record[name] for record in records]
+            if i == self.perfil_index:
+                unseen = set(values) - self.encoding.keys()
+                if unseen:
+                    raise ValueError(f"y contains previously unseen labels: {sorted(map(str, unseen))}")
+                X[:, i] = [self.encoding[value] for value in values]
+            else:
+                X[:, i] = [_as_float(value) for value in values]
+        X[:, self.numeric_index] = (X[:, self.numeric_index] - self.mean) / self.scale
+        return X
+
+    def estimators(self):
+        """The bundle's (rf_h, rf_c) without feature names, loaded once on first call."""
+        if self._estimators is None:
+            with self._lock:
+                if self._estimators is None:
+                    self._estimators = tuple(map(_without_feature_names, self._load_estimators()))
+        return self._estimators
+
+    def predict_proba(self, X):
+        """Return (prob_h, prob_c) for a scaled feature matrix in training column order."""
+        if self.forests and (len(X) <= COMPILED_MAX_ROWS or self.compact):
+            return self.forests['holding'].predict_proba(X), self.forests['churn'].predict_proba(X)
+        rf_h, rf_c = self.estimators()
+        return rf_h.predict_proba(X), rf_c.predict_proba(X)
+
+    def predict_many(self, X):
+        prob_h, prob_c = self.predict_proba(X)
+        # predict() is argmax over predict_proba(), so one call per forest is enough
+        pred_h = self.classes_h[prob_h.argmax(axis=1)]
+        pred_c = self.classes_c[prob_c.argmax(axis=1)]
+        return [
+            format_prediction(pred_h[i], prob_h[i], pred_c[i], prob_c[i], self.feature_importance)
+            for i in range(len(X))
+        ]
+
+    def predict_one(self, data):
+        return self.predict_many(self.build_row(data))[0]
+
+    def predict_records(self, records):
+        """Score several client dicts in one vectorized call.
+
+        Returns a list aligned with ``records`` holding either the prediction or the exception
+        raised while building that client's row, so one bad record does not fail the others.
+        """
+        results = [None] * len(records)
+        indices, rows = [], []
+        for i, data in enumerate(records):
+            try:
+                rows.append(self.build_row(data))
+                indices.append(i)
+            except (KeyError, TypeError, ValueError) as e:
+                results[i] = e
+        if rows:
+            for i, prediction in zip(indices, self.predict_many(np.vstack(rows))):
+                results[i] = prediction
+        return results
@@ -0,0 +1,64 @@
+import os
+import logging
+import socketserver
+from django.conf import settings
+from .batching import MicroBatcher
+from .ipc import send_message, recv_message
+from .model_cache import score_records
+from .registry import to_builtin
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # Connections may carry several requests; each is answered before reading the next.
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (OSError, ValueError) as e:
+                logger.debug(f"Dropping inference connection: {str(e)}")
+                return
+            if request is None:
+                return
+            try:
+                artifacts_dir = self.server.check_artifacts_dir(request['artifacts_dir'])
+                result, version, features = self.server.batcher.submit(artifacts_dir, request['data'])
+                response = {'result': to_builtin(result), 'version': version, 'features': list(features)}
+            except Exception as e:
+                response = {'error': str(e)}
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Owns the model artifacts and scores predictions for the web workers over a Unix socket.
+
+    Concurrent requests are coalesced by a MicroBatcher, so N clients arriving together cost
+    one predict_proba call per forest instead of N. Only run directories under ``runs_dir``
+    (MEDIA_ROOT/runs by default) are loaded, whatever path a client sends.
+    """
+    daemon_threads = True
+    # Every web worker thread may connect at once; the default backlog of 5 refuses bursts.
+    request_queue_size = 128
+
+    def __init__(self, socket_path, max_batch=64, window=0.0, runs_dir=None):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self.runs_dir = os.path.realpath(runs_dir or os.path.join(settings.MEDIA_ROOT, 'runs'))
+        self.batcher = MicroBatcher(score_records, max_batch=max_batch, window=window)
+        super().__init__(socket_path, _Handler)
+
+    def check_artifacts_dir(self, artifacts_dir):
+        """Return artifacts_dir unchanged; raises ValueError unless it resolves to a run directory."""
+        if os.path.dirname(os.path.realpath(artifacts_dir)) != self.runs_dir:
+            raise ValueError(f"{artifacts_dir} is not a run directory under {self.runs_dir}")
+        return artifacts_dir
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
@@ -0,0 +1,168 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from .dataset_cache import DATASET_DTYPES
+from .incremental import TARGETS, row_hashes
+
+
+logger = logging.getLogger(__name__)
+
+# Rows parsed per CSV chunk; peak memory of the ingestion is proportional to this, not to the file.
+CHUNK_ROWS = 200_000
+# Values kept per numeric column to estimate its median (exact for datasets up to this size).
+RESERVOIR_SIZE = 200_000
+NUMERIC_COLUMNS = ['Idade', 'Volume_Investimentos', 'Qtd_Servicos_Contratados', 'Score_Relacionamento']
+CATEGORICAL_COLUMN = 'Perfil_Risco'
+DROPPED_COLUMNS = TARGETS + ('Id',)
+FEATURES_FILE = 'features.f32'
+HASHES_FILE = 'row_hashes.u64'
+
+
+class Reservoir:
+    """Uniform sample of at most ``size`` values of a stream (algorithm R, vectorized per chunk)."""
+
+    def __init__(self, size=RESERVOIR_SIZE, random_state=42):
+        self.values = np.empty(size, dtype=np.float64)
+        self.filled = 0
+        self.seen = 0
+        self.rng = np.random.RandomState(random_state)
+
+    def add(self, values):
+        values = values[~np.isnan(values)]
+        size = len(self.values)
+        free = min(size - self.filled, len(values))
+        self.values[self.filled:self.filled + free] = values[:free]
+        self.filled += free
+        rest = values[free:]
+        if len(rest):
+            # The i-th value of the stream replaces a random slot with probability size / i.
+            slots = (self.rng.random_sample(len(rest)) * (self.seen + free + 1 + np.arange(len(rest)))).astype(np.int64)
+            keep = slots < size
+            self.values[slots[keep]] = rest[keep]
+        self.seen += len(values)
+
+    def median(self):
+        return float(np.median(self.values[:self.filled])) if self.filled else np.nan
+
+
+class StreamedDataset:
+    """A training CSV parsed chunk by chunk into on-disk arrays.
+
+    ``features`` is a float32 memory-mapped matrix in the column order of the CSV (minus the
+    targets and Id) and ``hashes`` the memory-mapped row hashes. Only ``labels``, the raw
+    Perfil_Risco column and the targets (a few bytes per row), is held in memory.
+    """
+
+    def __init__(self, work_dir, columns, n_rows, labels, medians, mode):
+        self.work_dir = work_dir
+        self.columns = columns
+        self.n_rows = n_rows
+        self.labels = labels
+        self.medians = medians
+        self.mode = mode
+        shape = (n_rows, len(columns))
+        self.features = np.memmap(os.path.join(work_dir, FEATURES_FILE), dtype=np.float32, mode='r+', shape=shape)
+        self.hashes = np.memmap(os.path.join(work_dir, HASHES_FILE), dtype=np.uint64, mode='r', shape=(n_rows,))
+
+    def features_frame(self):
+        """The feature matrix as a DataFrame backed by the memory map (no copy)."""
+        return pd.DataFrame(self.features, columns=self.columns, copy=False)
+
+    def unlink(self):
+        """Remove the array files; the mappings (and frames built on them) stay valid until released."""
+        for name in (FEATURES_FILE, HASHES_FILE):
+            path = os.path.join(self.work_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def stream_dataset(csv_path, work_dir, chunk_rows=CHUNK_ROWS):
+    """Parse csv_path in chunks of chunk_rows, writing features and row hashes to work_dir.
+
+    Row hashes are computed on the same typed chunks read_dataset produces, so the dataset
+    fingerprint does not depend on how the file was ingested. Medians come from a reservoir
+    sample of each numeric column and the Perfil_Risco mode from exact counts.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    columns, vocabulary, counts = None, {}, []
+    reservoirs = {col: Reservoir() for col in NUMERIC_COLUMNS}
+    codes, targets = [], {target: [] for target in TARGETS}
+    n_rows = 0
+
+    with open(os.path.join(work_dir, FEATURES_FILE), 'wb') as features_file, \
+            open(os.path.join(work_dir, HASHES_FILE), 'wb') as hashes_file:
+        for chunk in pd.read_csv(csv_path, dtype=DATASET_DTYPES, chunksize=chunk_rows):
+            if columns is None:
+                columns = [col for col in chunk.columns if col not in DROPPED_COLUMNS]
+            hashes_file.write(np.ascontiguousarray(row_hashes(chunk), dtype=np.uint64).tobytes())
+
+            # Perfil_Risco is encoded once the vocabulary is complete; keep its slot NaN for now.
+            block = chunk[columns].drop(columns=CATEGORICAL_COLUMN).astype(np.float32)
+            block.insert(columns.index(CATEGORICAL_COLUMN), CATEGORICAL_COLUMN, np.float32(np.nan))
+            features_file.write(np.ascontiguousarray(block.to_numpy(dtype=np.float32)).tobytes())
+            for col in NUMERIC_COLUMNS:
+                reservoirs[col].add(block[col].to_numpy(dtype=np.float64))
+
+            category = chunk[CATEGORICAL_COLUMN].astype('category')
+            for label in category.cat.categories:
+                if label not in vocabulary:
+                    vocabulary[label] = len(vocabulary)
+                    counts.append(0)
+            lookup = np.array([vocabulary[label] for label in category.cat.categories] + [-1], dtype=np.int32)
+            chunk_codes = lookup[category.cat.codes.to_numpy()]
+            codes.append(chunk_codes.astype(np.int16))
+            for code, count in zip(*np.unique(chunk_codes[chunk_codes >= 0], return_counts=True)):
+                counts[code] += int(count)
+            for target in TARGETS:
+                targets[target].append(chunk[target].to_numpy(dtype=np.int8))
+            n_rows += len(chunk)
+
+    if not n_rows:
+        raise ValueError("Dataset is empty")
+    categories = list(vocabulary)
+    labels = pd.DataFrame({
+        CATEGORICAL_COLUMN: pd.Categorical.from_codes(np.concatenate(codes), categories=categories),
+        **{target: np.concatenate(values) for target, values in targets.items()},
+    })
+    # Ties resolve to the smallest label, like Series.mode()[0].
+    mode = min(categories, key=lambda label: (-counts[vocabulary[label]], label)) if categories else None
+    medians = {col: reservoir.median() for col, reservoir in reservoirs.items()}
+    logger.debug(f"Streamed {n_rows} rows into {work_dir}")
+    return StreamedDataset(work_dir, columns, n_rows, labels, medians, mode)
+
+
+def preprocess_streamed(dataset, le=None, scaler=None, chunk_rows=CHUNK_ROWS):
+    """Impute, encode and scale the streamed features in place, block by block.
+
+    Without ``le``/``scaler`` new ones are fitted, the scaler incrementally with partial_fit
+    over the imputed blocks; otherwise the given ones are applied as they are.
+    """
+    features = dataset.features
+    numeric = [dataset.columns.index(col) for col in NUMERIC_COLUMNS]
+    medians = np.array([dataset.medians[col] for col in NUMERIC_COLUMNS], dtype=np.float32)
+    perfil = dataset.labels[CATEGORICAL_COLUMN]
+    if le is None:
+        le = LabelEncoder().fit(np.asarray(perfil.cat.categories))
+    # Codes per category of the streamed column; missing values take the mode's code.
+    lookup = np.append(le.transform(perfil.cat.categories), le.transform([dataset.mode])).astype(np.float32)
+    codes = perfil.cat.codes.to_numpy()
+
+    blocks = [slice(start, min(start + chunk_rows, dataset.n_rows)) for start in range(0, dataset.n_rows, chunk_rows)]
+    for rows in blocks:
+        values = features[rows][:, numeric]
+        missing = np.isnan(values)
+        values[missing] = np.broadcast_to(medians, values.shape)[missing]
+        features[rows, numeric] = values
+    fit = scaler is None
+    if fit:
+        scaler = StandardScaler()
+        for rows in blocks:
+            scaler.partial_fit(pd.DataFrame(features[rows][:, numeric], columns=NUMERIC_COLUMNS))
+    for rows in blocks:
+        features[rows, numeric] = scaler.transform(pd.DataFrame(features[rows][:, numeric], columns=NUMERIC_COLUMNS))
+        features[rows, dataset.columns.index(CATEGORICAL_COLUMN)] = lookup[codes[rows]]
+    features.flush()
+    logger.debug(f"Preprocessed {dataset.n_rows} streamed rows ({'fitted' if fit else 'reused'} scaler)")
+    return le, scaler
@@ -0,0 +1,60 @@
+"""Wire protocol between the web workers and the inference server.
+
+Messages are JSON objects prefixed by their length as a 4-byte big-endian integer, sent over
+a local Unix socket. This module only uses the standard library so the web workers can talk to
+the server without importing the ML stack.
+"""
+import json
+import socket
+import struct
+
+HEADER = struct.Struct('>I')
+
+
+class RemoteError(Exception):
+    """The inference server received the request but could not score it."""
+
+
+def send_message(sock, message):
+    body = json.dumps(message).encode()
+    sock.sendall(HEADER.pack(len(body)) + body)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError('Connection closed by peer')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock):
+    """Read one message; returns None when the peer closed the connection between messages."""
+    header = sock.recv(HEADER.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        header += _recv_exactly(sock, HEADER.size - len(header))
+    (size,) = HEADER.unpack(header)
+    return json.loads(_recv_exactly(sock, size))
+
+
+def predict_remote(socket_path, artifacts_dir, data, timeout=0.5):
+    """Score one client on the inference server; returns (prediction, model_version, feature_names).
+
+    Raises OSError (including socket.timeout) when the server is unreachable or too slow,
+    and RemoteError when it answered with an error.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        send_message(sock, {'artifacts_dir': artifacts_dir, 'data': data})
+        response = recv_message(sock)
+    if response is None:
+        raise ConnectionError('Inference server closed the connection')
+    if 'error' in response:
+        raise RemoteError(response['error'])
+    return response['result'], response['version'], response.get('features')
@@ -0,0 +1,47 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.db import close_old_connections, connections
+from .models import TrainingRun
+from .registry import create_run, execute_run
+
+
+logger = logging.getLogger(__name__)
+
+# One training at a time per process; queued runs wait in the database.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='predictor-training')
+
+
+def claim_run(run_id):
+    """Atomically move a queued run to running; returns the run, or None if someone else took it."""
+    claimed = TrainingRun.objects.filter(id=run_id, status='queued').update(status='running')
+    return TrainingRun.objects.get(id=run_id) if claimed else None
+
+
+def claim_next_run():
+    """Claim the oldest queued run, if any."""
+    for run_id in TrainingRun.objects.filter(status='queued').order_by('criado_em').values_list('id', flat=True):
+        run = claim_run(run_id)
+        if run is not None:
+            return run
+    return None
+
+
+def process_run(run_id):
+    """Executor entry point: claim and train one queued run."""
+    close_old_connections()
+    try:
+        run = claim_run(run_id)
+        if run is None:
+            return
+        execute_run(run)
+    except Exception as e:
+        logger.error(f"Training job {run_id} failed: {str(e)}")
+    finally:
+        connections.close_all()
+
+
+def enqueue_training(cloudinary_url=None, output_dir=None):
+    """Queue a training run and start it in the background; returns the run immediately."""
+    run = create_run(cloudinary_url, output_dir, status='queued')
+    _executor.submit(process_run, run.id)
+    return run
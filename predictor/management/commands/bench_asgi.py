@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import subprocess
+import http.client
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from predictor.registry import get_latest_run
+from predictor.synthetic import client_records
+from .bench_batching import run_clients
+
+# (server, command, path of the single prediction endpoint, path of the status endpoint)
+SERVERS = (
+    ('gunicorn sync', ['-m', 'gunicorn', 'core.wsgi:application', '--worker-class', 'sync'],
+     '/api/predict/', '/api/predict/model/'),
+    ('uvicorn async', ['-m', 'uvicorn', 'core.asgi:application', '--no-access-log', '--log-level', 'warning'],
+     '/api/async/predict/', '/api/async/predict/model/'),
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, path, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', path)
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+class Client:
+    """Per-thread keep-alive connections (gunicorn's sync workers close them after every response)."""
+
+    def __init__(self, port):
+        self.port = port
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.errors = 0
+
+    def request(self, method, path, body=None):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        try:
+            conn.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except OSError:
+            conn.close()
+            ok = False
+        if not ok:
+            with self.lock:
+                self.errors += 1
+
+
+class Command(BaseCommand):
+    help = ('Load-test single predictions through the sync views under gunicorn and the async views under '
+            'uvicorn, reporting sustained requests/s, latency and how responsive a cheap endpoint stays.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes of each server')
+        parser.add_argument('--clients', type=int, nargs='+', default=[8, 32, 128])
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per measurement')
+
+    def handle(self, *args, **options):
+        run = get_latest_run()
+        if run is None:
+            raise CommandError('No trained model available. Run train_predictor first.')
+        # Distinct bodies and no prediction cache, so every request is scored.
+        bodies = [json.dumps(record) for record in client_records(5000, seed=11)]
+        env = {**os.environ, 'PREDICTOR_CACHE_SIZE': '0', 'PREDICTOR_INFERENCE_SOCKET': '',
+               'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+
+        results = {}
+        for name, command, predict_path, status_path in SERVERS:
+            port = free_port()
+            bind = ['--bind', f"127.0.0.1:{port}"] if 'gunicorn' in command else ['--port', str(port)]
+            server = subprocess.Popen(
+                [sys.executable, *command, *bind, '--workers', str(options['workers'])],
+                cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+            try:
+                if not wait_until_up(port, status_path):
+                    server.terminate()
+                    raise CommandError(f"{name} did not start: {server.communicate()[1].decode()[-2000:]}")
+                self.stdout.write(f"{name} ({options['workers']} workers)")
+                results[name] = self.measure(port, predict_path, status_path, bodies, options)
+            finally:
+                server.terminate()
+                server.wait()
+
+        sync, async_ = (results[name] for name, *_ in SERVERS)
+        for clients in options['clients']:
+            self.stdout.write(f"{clients} clients: uvicorn/gunicorn requests/s "
+                              f"{async_[clients]['rps'] / max(sync[clients]['rps'], 1e-9):.2f}x")
+
+    def measure(self, port, predict_path, status_path, bodies, options):
+        client = Client(port)
+        post = lambda body: client.request('POST', predict_path, body)
+        results = {}
+        for clients in options['clients']:
+            # Warm up, so every worker has loaded the model and its pools before the clock starts.
+            run_clients(post, bodies, clients, min(1.0, options['duration']))
+            client.errors = 0
+            probe = {'stop': False, 'timings': []}
+
+            def probe_status():
+                # One extra client polling a cheap endpoint shows whether requests queue behind scoring.
+                status_client = Client(port)
+                while not probe['stop']:
+                    start = time.perf_counter()
+                    status_client.request('GET', status_path)
+                    probe['timings'].append(time.perf_counter() - start)
+                    time.sleep(0.05)
+
+            prober = threading.Thread(target=probe_status)
+            prober.start()
+            rps, p50, p99 = run_clients(post, bodies, clients, options['duration'])
+            probe['stop'] = True
+            prober.join()
+            status_ms = np.percentile(probe['timings'], 50) * 1000 if probe['timings'] else float('nan')
+            results[clients] = {'rps': rps, 'p50_ms': p50, 'p99_ms': p99, 'errors': client.errors,
+                                'status_p50_ms': status_ms}
+            self.stdout.write(f"  {clients:>4} clients: {rps:>8.0f} req/s  p50={p50:.1f} ms  p99={p99:.1f} ms  "
+                              f"errors={client.errors}  status p50={status_ms:.1f} ms")
+        return results
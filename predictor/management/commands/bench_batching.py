@@ -0,0 +1,68 @@
+import time
+import threading
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from predictor.batching import MicroBatcher
+from predictor.model_cache import model_holder, score_records
+from predictor.registry import get_latest_run
+from predictor.synthetic import client_records
+
+
+def run_clients(fn, records, clients, duration):
+    """Call fn from `clients` threads for `duration` seconds; returns (requests/s, p50 ms, p99 ms)."""
+    latencies = [[] for _ in range(clients)]
+    stop = time.perf_counter() + duration
+
+    def client(i):
+        n = i
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            fn(records[n % len(records)])
+            latencies[i].append(time.perf_counter() - start)
+            n += clients
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    timings = np.concatenate([np.asarray(t) for t in latencies])
+    return len(timings) / elapsed, np.percentile(timings, 50) * 1000, np.percentile(timings, 99) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Throughput and latency of single predictions with and without micro-batching.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 64])
+        parser.add_argument('--windows-ms', type=float, nargs='+', default=[0.0, 2.0])
+        parser.add_argument('--max-batch', type=int, default=64)
+        parser.add_argument('--duration', type=float, default=3.0, help='Seconds per measurement')
+
+    def handle(self, *args, **options):
+        run = get_latest_run()
+        if run is None:
+            raise CommandError('No trained model available. Run train_predictor first.')
+        bundle = model_holder.get(run.artifacts_dir)
+        records = client_records(1000, perfis=bundle.le.classes_)
+
+        modes = [('unbatched', bundle.engine.predict_one, None)]
+        for window_ms in options['windows_ms']:
+            batcher = MicroBatcher(score_records, max_batch=options['max_batch'], window=window_ms / 1000)
+            modes.append((f"batch {window_ms:g}ms",
+                          lambda record, batcher=batcher: batcher.submit(run.artifacts_dir, record), batcher))
+
+        for clients in options['clients']:
+            self.stdout.write(f"{clients} concurrent clients")
+            for name, fn, batcher in modes:
+                run_clients(fn, records, clients, min(0.5, options['duration']))
+                before = (batcher.batches, batcher.items) if batcher else None
+                rps, p50, p99 = run_clients(fn, records, clients, options['duration'])
+                line = f"  {name:>14}: {rps:>8.0f} req/s  p50={p50:.2f} ms  p99={p99:.2f} ms"
+                if batcher is not None:
+                    batches, items = batcher.batches - before[0], batcher.items - before[1]
+                    line += f"  mean batch {items / max(batches, 1):.1f}"
+                self.stdout.write(line)
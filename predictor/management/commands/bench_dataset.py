@@ -0,0 +1,66 @@
+import os
+import time
+import tempfile
+import multiprocessing
+from django.core.management.base import BaseCommand
+from predictor.dataset_cache import read_dataset, snapshot_path
+from predictor.synthetic import generate_clients
+
+
+def _peak_rss_mb():
+    """Peak RSS of this process in MB (VmHWM; unlike ru_maxrss it is reset by exec)."""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _measure_load(mode, csv_path, queue):
+    """Run in a fresh process: load the dataset and report (seconds, peak RSS growth in MB)."""
+    import pandas as pd
+    import pyarrow  # noqa: F401  (imported up front so it is part of the baseline)
+    from predictor.ingest import stream_dataset, preprocess_streamed
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'csv':
+        df = pd.read_csv(csv_path)
+    elif mode == 'feather':
+        df = pd.read_feather(snapshot_path(csv_path))
+    else:
+        # Streamed and fully preprocessed; only the labels stay in memory, the features are mapped.
+        with tempfile.TemporaryDirectory() as work_dir:
+            dataset = stream_dataset(csv_path, work_dir)
+            preprocess_streamed(dataset)
+            dataset.unlink()
+        df = dataset.labels
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, _peak_rss_mb() - baseline, df.memory_usage(deep=True).sum() / 1024 ** 2))
+
+
+class Command(BaseCommand):
+    help = 'Compare CSV parsing, the typed Feather snapshot and chunked ingestion for synthetic datasets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000],
+                            help='Dataset sizes to test, e.g. --rows 10000 1000000 10000000')
+
+    def handle(self, *args, **options):
+        ctx = multiprocessing.get_context('spawn')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for n_rows in options['rows']:
+                csv_path = os.path.join(tmp_dir, f"clientes_{n_rows}.csv")
+                generate_clients(n_rows).to_csv(csv_path, index=False)
+
+                start = time.perf_counter()
+                read_dataset(csv_path)
+                convert = time.perf_counter() - start
+
+                self.stdout.write(f"{n_rows:>10} rows  (one-off snapshot conversion {convert:.2f} s)")
+                for mode in ('csv', 'feather', 'chunked'):
+                    queue = ctx.Queue()
+                    process = ctx.Process(target=_measure_load, args=(mode, csv_path, queue))
+                    process.start()
+                    elapsed, peak, frame = queue.get()
+                    process.join()
+                    self.stdout.write(f"  {mode:>8}: load {elapsed:.3f} s  peak +{peak:.1f} MB  frame {frame:.1f} MB")
@@ -0,0 +1,46 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from predictor.registry import get_latest_run
+from predictor.model_cache import model_holder
+from predictor.synthetic import client_records
+from predictor.v2churn_predictor import predict_batch
+
+
+def latency_percentiles(fn, records, iterations):
+    """Call fn once per record and return (p50, p99) latency in milliseconds."""
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        record = records[i % len(records)]
+        start = time.perf_counter()
+        fn(record)
+        timings[i] = time.perf_counter() - start
+    return np.percentile(timings, 50) * 1000, np.percentile(timings, 99) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Compare single-row latency of the pandas path against the pure-NumPy inference engine.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000)
+        parser.add_argument('--warmup', type=int, default=50)
+
+    def handle(self, *args, **options):
+        run = get_latest_run()
+        if run is None:
+            raise CommandError('No trained model available. Run train_predictor first.')
+        bundle = model_holder.get(run.artifacts_dir)
+        records = client_records(500, perfis=bundle.le.classes_)
+
+        paths = [
+            ('pandas', lambda record: predict_batch([record], bundle=bundle)),
+            ('numpy', bundle.engine.predict_one),
+        ]
+        results = {}
+        for name, fn in paths:
+            latency_percentiles(fn, records, options['warmup'])
+            results[name] = latency_percentiles(fn, records, options['iterations'])
+            self.stdout.write(f"{name:>8}: p50={results[name][0]:.3f} ms  p99={results[name][1]:.3f} ms")
+
+        self.stdout.write(f"speedup: p50 x{results['pandas'][0] / results['numpy'][0]:.2f}  "
+                          f"p99 x{results['pandas'][1] / results['numpy'][1]:.2f}")
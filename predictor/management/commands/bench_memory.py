@@ -0,0 +1,85 @@
+import os
+import json
+from django.core.management.base import BaseCommand, CommandError
+from predictor.registry import get_latest_run
+from predictor.model_cache import ModelHolder
+from predictor.synthetic import client_records
+
+
+def process_memory():
+    """Return (rss, pss) of the current process in MB, read from /proc/self/smaps_rollup."""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0][:-1]] = int(parts[1]) / 1024
+    return values['Rss'], values['Pss']
+
+
+class Command(BaseCommand):
+    help = 'Measure per-worker RSS/PSS of forked workers with and without preloaded, memory-mapped artifacts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        if not os.path.exists('/proc/self/smaps_rollup'):
+            raise CommandError('This benchmark needs Linux /proc/self/smaps_rollup.')
+        run = get_latest_run()
+        if run is None:
+            raise CommandError('No trained model available. Run train_predictor first.')
+
+        modes = [
+            ('per-worker load, in-memory', False, None),
+            ('preload before fork, mmap', True, 'r'),
+        ]
+        for label, preload, mmap_mode in modes:
+            rss, pss = self.measure(run.artifacts_dir, options['workers'], preload, mmap_mode)
+            self.stdout.write(f"{label:>30}: RSS {rss:.1f} MB/worker  PSS {pss:.1f} MB/worker")
+
+    def measure(self, artifacts_dir, workers, preload, mmap_mode):
+        holder = ModelHolder(mmap_mode=mmap_mode)
+        if preload:
+            holder.get(artifacts_dir)
+
+        # Workers load and score, wait until all siblings are ready, then sample their memory
+        # and stay alive until everyone has reported, so PSS splits shared pages fairly.
+        ready_r, ready_w = os.pipe()
+        go_r, go_w = os.pipe()
+        done_r, done_w = os.pipe()
+        children = []
+        for _ in range(workers):
+            result_r, result_w = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                bundle = holder.get(artifacts_dir)
+                for record in client_records(50, perfis=bundle.le.classes_):
+                    bundle.engine.predict_one(record)
+                os.close(go_w)
+                os.close(done_w)
+                os.write(ready_w, b'.')
+                os.read(go_r, 1)
+                os.write(result_w, json.dumps(process_memory()).encode())
+                os.close(result_w)
+                os.read(done_r, 1)
+                os._exit(0)
+            os.close(result_w)
+            children.append((pid, result_r))
+
+        for _ in range(workers):
+            os.read(ready_r, 1)
+        os.close(go_w)
+        samples = []
+        for pid, result_r in children:
+            with os.fdopen(result_r) as f:
+                samples.append(json.loads(f.read()))
+        os.close(done_w)
+        for pid, _ in children:
+            os.waitpid(pid, 0)
+        for fd in (ready_r, ready_w, go_r, done_r):
+            os.close(fd)
+
+        rss = sum(s[0] for s in samples) / workers
+        pss = sum(s[1] for s in samples) / workers
+        return rss, pss
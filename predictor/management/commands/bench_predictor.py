@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import multiprocessing
+from functools import partial
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from .bench_dataset import _peak_rss_mb
+from .bench_startup import git_commit
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _bench_size(n_rows, iterations, batch_sizes, queue):
+    """Run in a fresh process: train on n_rows synthetic clients and measure serving the model."""
+    import django
+    django.setup()
+    import numpy as np
+    from predictor.model_cache import ModelHolder
+    from predictor.synthetic import generate_clients, client_records
+    from predictor.v2churn_predictor import run_predictor, predict_single, predict_batch
+    from .bench_inference import latency_percentiles
+
+    baseline = _peak_rss_mb()
+    result = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        generate_clients(n_rows).to_csv(os.path.join(tmp_dir, 'clientes.csv'), index=False)
+        # Served over HTTP so training goes through the same download path as in production.
+        server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=tmp_dir))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        output_dir = os.path.join(tmp_dir, 'model')
+        try:
+            start = time.perf_counter()
+            payload = run_predictor(
+                f"http://127.0.0.1:{server.server_port}/clientes.csv", output_dir,
+                cache_dir=os.path.join(tmp_dir, 'datasets')
+            )
+            result['train_s'] = time.perf_counter() - start
+        finally:
+            server.shutdown()
+            server.server_close()
+        result['stages_s'] = payload['timings']
+        result['holding_f1'] = payload['holding_f1_score']
+        result['churn_f1'] = payload['churn_f1_score']
+        result['artifacts_mb'] = sum(
+            entry.stat().st_size for entry in os.scandir(output_dir) if entry.is_file()
+        ) / 1024 ** 2
+
+        start = time.perf_counter()
+        bundle = ModelHolder().get(output_dir)
+        result['load_ms'] = (time.perf_counter() - start) * 1000
+
+        records = client_records(max(iterations, max(batch_sizes)), seed=7, perfis=bundle.le.classes_)
+        single = partial(predict_single, output_dir=output_dir, bundle=bundle)
+        latency_percentiles(single, records, min(50, iterations))
+        start = time.perf_counter()
+        result['single_p50_ms'], result['single_p99_ms'] = latency_percentiles(single, records, iterations)
+        result['single_rps'] = iterations / (time.perf_counter() - start)
+
+        result['batch'] = {}
+        for size in batch_sizes:
+            batch = records[:size]
+            repeats = max(3, 2000 // size)
+            timings = np.empty(repeats)
+            for i in range(repeats):
+                start = time.perf_counter()
+                predict_batch(batch, output_dir, bundle=bundle)
+                timings[i] = time.perf_counter() - start
+            result['batch'][str(size)] = {
+                'p50_ms': np.percentile(timings, 50) * 1000,
+                'rows_per_s': size / np.median(timings),
+            }
+    result['peak_rss_mb'] = _peak_rss_mb() - baseline
+    queue.put(result)
+
+
+def last_result(history):
+    """Return the most recent result recorded in the history file, or None."""
+    try:
+        with open(history) as f:
+            lines = [line for line in f if line.strip()]
+    except OSError:
+        return None
+    return json.loads(lines[-1]) if lines else None
+
+
+class Command(BaseCommand):
+    help = ('Train on synthetic datasets of several sizes and measure training time, artifact size, '
+            'load time, single/batch prediction latency and peak RSS; results are appended as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000],
+                            help='Dataset sizes to train on, e.g. --sizes 1000 10000 100000')
+        parser.add_argument('--iterations', type=int, default=1000, help='Single predictions timed per size')
+        parser.add_argument('--batch-sizes', type=int, nargs='+', default=[64, 1024])
+        parser.add_argument('--history', default=os.path.join(settings.BASE_DIR, 'bench', 'predictor.jsonl'),
+                            help='JSON lines file the result is appended to and compared against')
+
+    def handle(self, *args, **options):
+        previous = last_result(options['history'])
+        ctx = multiprocessing.get_context('spawn')
+        sizes = {}
+        for n_rows in options['sizes']:
+            queue = ctx.Queue()
+            process = ctx.Process(target=_bench_size,
+                                  args=(n_rows, options['iterations'], options['batch_sizes'], queue))
+            process.start()
+            process.join()
+            if process.exitcode != 0 or queue.empty():
+                raise CommandError(f"Benchmark for {n_rows} rows failed (exit code {process.exitcode})")
+            sizes[str(n_rows)] = result = queue.get()
+            self.report(n_rows, result, (previous or {}).get('sizes', {}).get(str(n_rows)))
+
+        result = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'sizes': sizes,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(options['history'])), exist_ok=True)
+        with open(options['history'], 'a') as f:
+            f.write(json.dumps(result) + '\n')
+        if previous:
+            self.stdout.write(f"(changes against {previous.get('commit') or 'unknown commit'} "
+                              f"from {previous['timestamp']})")
+
+    def report(self, n_rows, result, previous):
+        def change(key):
+            if not previous or not previous.get(key):
+                return ''
+            return f" ({(result[key] - previous[key]) / previous[key] * 100:+.0f}%)"
+
+        self.stdout.write(f"{n_rows:>10} rows")
+        self.stdout.write(f"  train {result['train_s']:.2f} s{change('train_s')}  "
+                          f"f1 holding {result['holding_f1']:.3f} churn {result['churn_f1']:.3f}")
+        self.stdout.write(f"  artifacts {result['artifacts_mb']:.2f} MB{change('artifacts_mb')}  "
+                          f"load {result['load_ms']:.1f} ms{change('load_ms')}  "
+                          f"peak RSS +{result['peak_rss_mb']:.1f} MB{change('peak_rss_mb')}")
+        self.stdout.write(f"  single p50 {result['single_p50_ms']:.3f} ms{change('single_p50_ms')}  "
+                          f"p99 {result['single_p99_ms']:.3f} ms{change('single_p99_ms')}  "
+                          f"{result['single_rps']:.0f} req/s")
+        for size, batch in result['batch'].items():
+            self.stdout.write(f"  batch {size:>5}: p50 {batch['p50_ms']:.2f} ms  {batch['rows_per_s']:.0f} rows/s")
@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+import subprocess
+from collections import defaultdict
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Boot the project the way a WSGI worker does and report resident memory once it is up.
+BOOT_SCRIPT = (
+    "import django; django.setup(); import core.urls; "
+    "print(open('/proc/self/status').read().split('VmRSS:')[1].split()[0])"
+)
+HEAVY_PACKAGES = ('pandas', 'numpy', 'sklearn', 'scipy', 'matplotlib', 'seaborn', 'joblib', 'pyarrow')
+
+
+def parse_importtime(stderr):
+    """Sum the self time (microseconds) of every module in -X importtime output, per top-level package."""
+    per_package = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = [part.strip() for part in line[len('import time:'):].split('|')]
+        per_package[name.split('.')[0]] += int(self_us)
+    return per_package
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Measure Django boot time and memory, and which packages are imported at startup.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Number of packages to list')
+        parser.add_argument('--history', default=os.path.join(settings.BASE_DIR, 'bench', 'startup.jsonl'),
+                            help='JSON lines file the result is appended to')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+                                 cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        if process.returncode != 0:
+            raise CommandError(f"Boot failed: {process.stderr.splitlines()[-1] if process.stderr else ''}")
+
+        per_package = parse_importtime(process.stderr)
+        result = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'import_ms': round(sum(per_package.values()) / 1000, 1),
+            'rss_mb': round(int(process.stdout.split()[-1]) / 1024, 1),
+            'heavy_packages': [name for name in HEAVY_PACKAGES if name in per_package],
+            'top_packages': {
+                name: round(us / 1000, 1)
+                for name, us in sorted(per_package.items(), key=lambda item: -item[1])[:options['top']]
+            },
+        }
+
+        self.stdout.write(f"imports: {result['import_ms']:.1f} ms  rss: {result['rss_mb']:.1f} MB")
+        self.stdout.write(f"heavy packages loaded: {', '.join(result['heavy_packages']) or 'none'}")
+        for name, ms in result['top_packages'].items():
+            self.stdout.write(f"  {name:<24} {ms:>8.1f} ms")
+
+        os.makedirs(os.path.dirname(os.path.abspath(options['history'])), exist_ok=True)
+        with open(options['history'], 'a') as f:
+            f.write(json.dumps(result) + '\n')
@@ -0,0 +1,89 @@
+import os
+import time
+import joblib
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from predictor.models import TrainingRun
+from predictor.registry import get_latest_run
+
+
+class Command(BaseCommand):
+    help = ('Export pruned forests with compact dtypes for a committed run, report their accuracy against the '
+            'original forests on the run\'s held-out rows and how long each bundle takes to load.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run', help='Training run id (defaults to the latest committed run).')
+        parser.add_argument('--max-depth', type=int, default=12, help='Depth cap of the pruned trees')
+        parser.add_argument('--ccp-alpha', type=float, default=0.0,
+                            help='Cost-complexity pruning strength, as RandomForestClassifier\'s ccp_alpha')
+        parser.add_argument('--dry-run', action='store_true', help='Report the deltas without writing the artifact')
+
+    def handle(self, *args, **options):
+        from predictor.artifacts import COMPACT_FILE, artifact_signature
+        from predictor.compact import compact_forest, holdout_report, save_compact_model
+        from predictor.dataset_cache import fetch_dataset, read_dataset
+        from predictor.forest import compile_forest
+        from predictor.incremental import HOLDOUT_FILE
+        from predictor.model_cache import ModelBundle
+        from predictor.v2churn_predictor import dataset_fingerprint, run_features
+
+        if options['run']:
+            run = TrainingRun.objects.filter(id=options['run'], status='committed').first()
+        else:
+            run = get_latest_run()
+        if run is None:
+            raise CommandError("No committed training run to export")
+        output_dir = run.artifacts_dir
+        holdout_path = os.path.join(output_dir, HOLDOUT_FILE)
+        if not os.path.exists(holdout_path):
+            raise CommandError(f"Run {run.id} has no {HOLDOUT_FILE}; runs saved before held-out rows were "
+                               f"stored cannot be evaluated, train a new one first")
+
+        try:
+            df = read_dataset(fetch_dataset(run.dataset_url, settings.PREDICTOR_DATASET_CACHE_DIR))
+        except Exception as e:
+            raise CommandError(f"Could not load the dataset: {str(e)}")
+        if dataset_fingerprint(df) != run.dataset_fingerprint:
+            raise CommandError(f"The dataset at {run.dataset_url} changed since run {run.id} was trained")
+        X, y = run_features(df, output_dir)
+        test = np.load(holdout_path)
+
+        forests, reports = {}, {}
+        for name, filename, column, average in (('holding', 'rf_holding.pkl', 'Abriu_Holding', 'binary'),
+                                                ('churn', 'rf_churn.pkl', 'Risco_Churn', 'weighted')):
+            rf = joblib.load(os.path.join(output_dir, filename))
+            forests[name] = compact_forest(rf, options['max_depth'], options['ccp_alpha'])
+            reports[name] = holdout_report(rf, forests[name], X.iloc[test], y[column].iloc[test], average)
+            reports[name]['bytes'] = {
+                'original': int(sum(array.nbytes for array in compile_forest(rf).values())),
+                'compact': int(sum(array.nbytes for array in forests[name].values())),
+            }
+            self.write_report(name, reports[name])
+
+        report = {'max_depth': options['max_depth'], 'ccp_alpha': options['ccp_alpha'], 'targets': reports}
+        if options['dry_run']:
+            return
+        path = os.path.join(output_dir, COMPACT_FILE)
+        save_compact_model(forests, X.columns, report, path)
+
+        signature = artifact_signature(output_dir)
+        load_ms = {}
+        for compact in (False, True):
+            start = time.perf_counter()
+            ModelBundle(output_dir, signature, compact=compact)
+            load_ms[compact] = (time.perf_counter() - start) * 1000
+        self.stdout.write(f"Bundle load: {load_ms[False]:.1f} ms original, {load_ms[True]:.1f} ms compact")
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {path} ({os.path.getsize(path) / 1024:.0f} KB) for run {run.id}"
+        ))
+
+    def write_report(self, name, report):
+        self.stdout.write(f"{name}: depth {report['depth']['original']} -> {report['depth']['compact']}, "
+                          f"{report['nodes']['original']} -> {report['nodes']['compact']} nodes, "
+                          f"{report['bytes']['original'] / 1024:.0f} KB -> {report['bytes']['compact'] / 1024:.0f} KB")
+        for metric in ('accuracy', 'f1'):
+            scores = report[metric]
+            self.stdout.write(f"  {metric:<8} {scores['original']:.4f} -> {scores['compact']:.4f} "
+                              f"({scores['delta']:+.4f})")
+        self.stdout.write(f"  max probability difference {report['max_proba_diff']:.4f}")
@@ -0,0 +1,41 @@
+import signal
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from predictor.inference_server import InferenceServer
+from predictor.model_cache import model_holder
+from predictor.registry import get_latest_run
+
+
+def _terminate(signum, frame):
+    raise SystemExit(0)
+
+
+class Command(BaseCommand):
+    help = 'Serve predictions over a Unix socket from a single process that owns the model.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.PREDICTOR_INFERENCE_SOCKET,
+                            help='Socket path (defaults to PREDICTOR_INFERENCE_SOCKET)')
+        parser.add_argument('--max-batch', type=int, default=settings.PREDICTOR_BATCH_MAX_ROWS)
+        parser.add_argument('--window-ms', type=float, default=settings.PREDICTOR_BATCH_WINDOW_MS)
+
+    def handle(self, *args, **options):
+        if not options['socket']:
+            raise CommandError('No socket path. Pass --socket or set PREDICTOR_INFERENCE_SOCKET.')
+
+        run = get_latest_run()
+        if run is not None:
+            bundle = model_holder.get(run.artifacts_dir)
+            self.stdout.write(f"Loaded model {bundle.version}")
+
+        server = InferenceServer(options['socket'], max_batch=options['max_batch'],
+                                 window=options['window_ms'] / 1000)
+        signal.signal(signal.SIGTERM, _terminate)
+        self.stdout.write(f"Serving predictions on {options['socket']}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Served {server.batcher.items} predictions in {server.batcher.batches} batches")
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from predictor.jobs import claim_next_run
+from predictor.registry import execute_run
+
+
+class Command(BaseCommand):
+    help = 'Process queued training runs from the database queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the queue once and exit.')
+        parser.add_argument('--poll-interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            run = claim_next_run()
+            if run is not None:
+                self.stdout.write(f"Training run {run.id}")
+                try:
+                    execute_run(run)
+                    self.stdout.write(self.style.SUCCESS(f"Committed training run {run.id}"))
+                except Exception as e:
+                    self.stderr.write(f"Training run {run.id} failed: {str(e)}")
+                continue
+            if options['once']:
+                return
+            time.sleep(options['poll_interval'])
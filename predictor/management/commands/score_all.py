@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from predictor.model_cache import model_holder
+from predictor.registry import get_latest_run
+from predictor.scoring import check_profiles, score_users
+
+
+class Command(BaseCommand):
+    help = 'Score every user with the latest model and store the results in ClientScore.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        run = get_latest_run()
+        if run is None:
+            raise CommandError('No trained model available. Run train_predictor first.')
+        bundle = model_holder.get(run.artifacts_dir)
+        try:
+            check_profiles(bundle)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        start = time.perf_counter()
+        total = score_users(run, bundle, chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {total} users with model {bundle.version} in {elapsed:.2f} s "
+            f"({total / elapsed if elapsed else 0:.0f} users/s)"
+        ))
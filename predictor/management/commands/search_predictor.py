@@ -0,0 +1,72 @@
+import os
+import json
+import tempfile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from predictor.registry import to_builtin, train_model
+
+# Search report written next to the artifacts of the registered run.
+SEARCH_FILE = 'search.json'
+
+
+class Command(BaseCommand):
+    help = ('Search forest hyperparameters with successive halving, pick the Pareto-best trade-off between '
+            'F1 and serving latency/size for each target and register a model trained with them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='CSV dataset URL (defaults to PREDICTOR_DATASET_URL).')
+        parser.add_argument('--candidates', type=int, default=24, help='Random candidates in the first round')
+        parser.add_argument('--factor', type=int, default=3, help='Halving factor between rounds')
+        parser.add_argument('--finalists', type=int, default=8, help='Candidates refitted and timed at the end')
+        parser.add_argument('--max-f1-drop', type=float, default=0.01,
+                            help='F1 the chosen model may lose against the best one in exchange for speed')
+        parser.add_argument('--n-jobs', type=int, default=-1)
+        parser.add_argument('--dry-run', action='store_true', help='Report the search without registering a model')
+
+    def handle(self, *args, **options):
+        from predictor.search import TARGET_SCORING, search_target
+        from predictor.v2churn_predictor import holdout_folds, load_and_preprocess_data
+
+        url = options['url'] or settings.PREDICTOR_DATASET_URL
+        report = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            try:
+                X, y, *_ = load_and_preprocess_data(
+                    url, tmp_dir, cache_dir=settings.PREDICTOR_DATASET_CACHE_DIR,
+                    full_refit_reason='requested', chunked_ingest_mb=settings.PREDICTOR_CHUNKED_INGEST_MB
+                )
+            except Exception as e:
+                raise CommandError(f"Could not load the dataset: {str(e)}")
+            # The holdout run_predictor evaluates on, so candidate scores compare with the registry's.
+            train, test = next(holdout_folds(len(X)))
+            for target, (column, scoring) in TARGET_SCORING.items():
+                report[target] = search_target(
+                    X, y[column], scoring, train, test, n_candidates=options['candidates'],
+                    factor=options['factor'], n_finalists=options['finalists'],
+                    max_score_drop=options['max_f1_drop'], n_jobs=options['n_jobs']
+                )
+                self.write_report(target, report[target])
+
+        params = {target: result['chosen']['params'] for target, result in report.items()}
+        if options['dry_run']:
+            return
+        try:
+            run = train_model(cloudinary_url=url, full=True, params=params)
+        except Exception as e:
+            raise CommandError(f"Training failed: {str(e)}")
+        with open(os.path.join(run.artifacts_dir, SEARCH_FILE), 'w') as f:
+            json.dump(to_builtin(report), f, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f"Committed training run {run.id} with holding F1 {run.payload['holding_f1_score']:.3f} "
+            f"and churn F1 {run.payload['churn_f1_score']:.3f}"
+        ))
+
+    def write_report(self, target, result):
+        self.stdout.write(f"{target} ({result['scoring']}, {result['rounds']} rounds on "
+                          f"{' -> '.join(str(n) for n in result['rows_per_round'])} rows)")
+        for candidate in sorted(result['candidates'], key=lambda c: -c['score']):
+            marker = '*' if candidate is result['chosen'] else ('p' if candidate['pareto'] else ' ')
+            params = ' '.join(f"{k}={v}" for k, v in sorted(candidate['params'].items()))
+            self.stdout.write(f"  {marker} score {candidate['score']:.4f}  {candidate['latency_ms']:.3f} ms  "
+                              f"{candidate['size_kb']:>8.0f} KB  {params}")
+        self.stdout.write("  (* chosen, p Pareto front)")
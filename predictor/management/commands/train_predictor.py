@@ -0,0 +1,37 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from predictor.registry import PROFILE_FILE, train_model
+
+
+class Command(BaseCommand):
+    help = 'Train the holding/churn models and commit a new version to the model registry.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='CSV dataset URL (defaults to PREDICTOR_DATASET_URL).')
+        parser.add_argument('--output-dir', help='Base directory for run artifacts (defaults to MEDIA_ROOT).')
+        parser.add_argument('--full', action='store_true', help='Refit from scratch even if only rows were appended.')
+        parser.add_argument('--profile', action='store_true',
+                            help=f'Write a cProfile of the training to {PROFILE_FILE} in the run directory.')
+
+    def handle(self, *args, **options):
+        try:
+            run = train_model(cloudinary_url=options['url'], output_dir=options['output_dir'], full=options['full'],
+                              profile=options['profile'])
+        except Exception as e:
+            raise CommandError(f"Training failed: {str(e)}")
+        if run.status == 'unchanged':
+            self.stdout.write(f"Dataset unchanged since the latest run; kept its model (run {run.id} not committed)")
+            return
+        mode = run.modo_treino + (f" ({run.motivo_refit})" if run.motivo_refit else '')
+        self.stdout.write(self.style.SUCCESS(f"Committed {mode} training run {run.id} ({run.artifacts_dir})"))
+        self.write_spans(run.spans)
+        if options['profile']:
+            self.stdout.write(f"Profile written to {os.path.join(run.artifacts_dir, PROFILE_FILE)}")
+
+    def write_spans(self, spans, parent=None, depth=0):
+        """Print the span tree, children indented under their parent."""
+        for span in spans:
+            if span['parent'] == parent:
+                attrs = ' '.join(f"{k}={v}" for k, v in span.get('attrs', {}).items())
+                self.stdout.write(f"{'  ' * depth}{span['name']:<{28 - 2 * depth}} {span['duration_s']:>9.3f} s  {attrs}")
+                self.write_spans(spans, span['id'], depth + 1)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 11:59
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainingRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('running', 'Em execução'), ('committed', 'Concluído'), ('failed', 'Falhou')], default='running', max_length=30, verbose_name='Status')),
+                ('dataset_url', models.URLField(max_length=500, verbose_name='URL do Dataset')),
+                ('dataset_fingerprint', models.CharField(blank=True, max_length=64, verbose_name='Fingerprint do Dataset')),
+                ('artifacts_dir', models.CharField(max_length=500, verbose_name='Diretório de Artefatos')),
+                ('payload', models.JSONField(blank=True, null=True, verbose_name='Métricas')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingrun',
+            name='etapa',
+            field=models.CharField(blank=True, max_length=30, verbose_name='Etapa'),
+        ),
+        migrations.AlterField(
+            model_name='trainingrun',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Na fila'), ('running', 'Em execução'), ('committed', 'Concluído'), ('failed', 'Falhou')], default='running', max_length=30, verbose_name='Status'),
+        ),
+    ]
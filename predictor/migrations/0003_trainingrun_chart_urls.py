@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0002_trainingrun_etapa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingrun',
+            name='chart_urls',
+            field=models.JSONField(blank=True, default=dict, verbose_name='URLs dos Gráficos'),
+        ),
+    ]
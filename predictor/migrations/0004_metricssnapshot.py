@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 12:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0003_trainingrun_chart_urls'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metrics', models.JSONField(verbose_name='Métricas')),
+                ('performance', models.JSONField(verbose_name='Desempenho')),
+                ('stats', models.JSONField(verbose_name='Estatísticas')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='predictor.trainingrun', verbose_name='Treinamento')),
+            ],
+            options={
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
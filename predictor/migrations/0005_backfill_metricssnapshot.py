@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 12:21
+
+from django.db import migrations
+
+SECTIONS = ['metrics', 'performance', 'stats']
+
+
+def backfill_snapshots(apps, schema_editor):
+    """Move the dashboard sections of already committed runs into MetricsSnapshot."""
+    TrainingRun = apps.get_model('predictor', 'TrainingRun')
+    MetricsSnapshot = apps.get_model('predictor', 'MetricsSnapshot')
+    for run in TrainingRun.objects.filter(status='committed', snapshot__isnull=True):
+        payload = run.payload or {}
+        if not all(section in payload for section in SECTIONS):
+            continue
+        MetricsSnapshot.objects.create(run=run, **{section: payload.pop(section) for section in SECTIONS})
+        run.payload = payload
+        run.save(update_fields=['payload'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0004_metricssnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
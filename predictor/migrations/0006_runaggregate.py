@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 12:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0005_backfill_metricssnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RunAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_previsoes', models.PositiveIntegerField(verbose_name='Total de Previsões')),
+                ('conversoes_holding', models.PositiveIntegerField(verbose_name='Conversões em Holding')),
+                ('clientes_risco_medio', models.PositiveIntegerField(verbose_name='Clientes com Risco Médio')),
+                ('acuracia', models.FloatField(verbose_name='Acurácia')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='aggregate', to='predictor.trainingrun', verbose_name='Treinamento')),
+            ],
+            options={
+                'ordering': ['criado_em'],
+            },
+        ),
+    ]
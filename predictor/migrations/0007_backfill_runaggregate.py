@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 12:22
+
+from django.db import migrations
+
+
+def backfill_aggregates(apps, schema_editor):
+    """Seed the time series from the snapshots of runs committed before it existed."""
+    MetricsSnapshot = apps.get_model('predictor', 'MetricsSnapshot')
+    RunAggregate = apps.get_model('predictor', 'RunAggregate')
+    for snapshot in MetricsSnapshot.objects.select_related('run').filter(run__aggregate__isnull=True):
+        metrics = snapshot.metrics
+        aggregate = RunAggregate.objects.create(
+            run=snapshot.run,
+            total_previsoes=metrics['totalPredictions'],
+            conversoes_holding=metrics['holdingConversions'],
+            clientes_risco_medio=metrics['highRiskClients'],
+            acuracia=metrics['modelAccuracy'],
+        )
+        # auto_now_add stamps the migration time; place the point when the run was committed.
+        RunAggregate.objects.filter(pk=aggregate.pk).update(
+            criado_em=snapshot.run.concluido_em or snapshot.criado_em
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0006_runaggregate'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
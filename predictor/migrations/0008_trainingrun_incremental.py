@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0007_backfill_runaggregate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingrun',
+            name='linhas_base',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Linhas no Último Treino Completo'),
+        ),
+        migrations.AddField(
+            model_name='trainingrun',
+            name='modo_treino',
+            field=models.CharField(blank=True, choices=[('full', 'Completo'), ('incremental', 'Incremental')], max_length=20, verbose_name='Modo de Treino'),
+        ),
+        migrations.AddField(
+            model_name='trainingrun',
+            name='motivo_refit',
+            field=models.CharField(blank=True, max_length=50, verbose_name='Motivo do Treino Completo'),
+        ),
+        migrations.AddField(
+            model_name='trainingrun',
+            name='n_linhas',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Linhas do Dataset'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 12:31
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0008_trainingrun_incremental'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientScore',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('prob_holding', models.FloatField(db_index=True, verbose_name='Probabilidade de Holding (%)')),
+                ('prob_churn', models.FloatField(db_index=True, verbose_name='Probabilidade de Churn (%)')),
+                ('abriu_holding', models.BooleanField(verbose_name='Previsão de Holding')),
+                ('risco_churn', models.CharField(choices=[('Baixo', 'Baixo'), ('Médio', 'Médio')], db_index=True, max_length=10, verbose_name='Risco de Churn')),
+                ('atualizado_em', models.DateTimeField(verbose_name='Atualizado em')),
+                ('run', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scores', to='predictor.trainingrun', verbose_name='Treinamento')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='score', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'ordering': ['-prob_churn'],
+            },
+        ),
+    ]
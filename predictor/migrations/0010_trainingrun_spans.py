@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0009_clientscore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingrun',
+            name='spans',
+            field=models.JSONField(blank=True, default=list, verbose_name='Spans de Execução'),
+        ),
+    ]
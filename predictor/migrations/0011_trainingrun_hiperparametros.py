@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0010_trainingrun_spans'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingrun',
+            name='hiperparametros',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Hiperparâmetros'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0011_trainingrun_hiperparametros'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trainingrun',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Na fila'), ('running', 'Em execução'), ('committed', 'Concluído'), ('unchanged', 'Sem alterações'), ('failed', 'Falhou')], default='running', max_length=30, verbose_name='Status'),
+        ),
+    ]
@@ -0,0 +1,124 @@
+import os
+import threading
+import logging
+from collections import Counter, OrderedDict
+import joblib
+from django.conf import settings
+from django.utils import timezone
+from .artifacts import ARTIFACT_FILES, COMPACT_FILE, FOREST_FILE, artifact_signature, signature_version
+from .inference import InferenceEngine
+from .forest import load_compiled_forests
+from .compact import load_compact_model
+
+
+logger = logging.getLogger(__name__)
+
+
+# The pickled sklearn forests, only needed for batches above COMPILED_MAX_ROWS.
+ESTIMATORS = ('rf_h', 'rf_c')
+
+
+class ModelBundle:
+    """Fitted encoder, scaler and forests loaded from one artifact directory.
+
+    The memory-mapped compiled forests serve every request; the pickled estimators (most of the
+    bundle's heap) are only read by load_estimators, the first time a large batch needs them.
+    With ``compact`` (PREDICTOR_SERVE_COMPACT by default) and a COMPACT_FILE exported for the
+    run, the pruned forests are served and the pickled estimators are not loaded at all.
+    """
+
+    def __init__(self, output_dir, signature, mmap_mode='r', compact=None):
+        if compact is None:
+            compact = settings.PREDICTOR_SERVE_COMPACT
+        compact_path = os.path.join(output_dir, COMPACT_FILE)
+        self.compact = compact and os.path.exists(compact_path)
+        for attr, filename in ARTIFACT_FILES.items():
+            if attr not in ESTIMATORS:
+                setattr(self, attr, joblib.load(os.path.join(output_dir, filename)))
+        forest_path = os.path.join(output_dir, FOREST_FILE)
+        if self.compact:
+            self.forests, self.feature_names, _ = load_compact_model(compact_path, mmap_mode=mmap_mode)
+        # Runs trained before forests were compiled only have the pickled estimators.
+        elif os.path.exists(forest_path):
+            self.forests = load_compiled_forests(forest_path, mmap_mode=mmap_mode)
+        else:
+            self.forests = {}
+        if not self.compact:
+            # Holding importances are saved in training column order.
+            self.feature_names = list(self.importances_h)
+        self.output_dir = output_dir
+        self.signature = signature
+        self.version = signature_version(output_dir, signature)
+        self.engine = InferenceEngine(self)
+        self.loaded_at = timezone.now()
+
+    def load_estimators(self):
+        """Read the pickled (rf_h, rf_c) from disk, or None for a compact bundle, which has none."""
+        if self.compact:
+            return None
+        logger.debug(f"Loading sklearn estimators from {self.output_dir}")
+        return tuple(joblib.load(os.path.join(self.output_dir, ARTIFACT_FILES[attr])) for attr in ESTIMATORS)
+
+
+class ModelHolder:
+    """Per-worker holder that keeps bundles resident, keyed by artifact directory.
+
+    A directory's bundle is swapped when its files change. The ``max_bundles`` most recently
+    loaded directories stay resident, so requests still naming the previous run while a new one
+    rolls out are served from memory instead of reloading on every alternation.
+    """
+
+    def __init__(self, mmap_mode='r', max_bundles=2):
+        self.mmap_mode = mmap_mode
+        self.max_bundles = max_bundles
+        self._lock = threading.Lock()
+        self._bundles = OrderedDict()
+        self._latest = None
+        self.loads = 0
+        self.served = Counter()
+
+    def get(self, output_dir):
+        key = os.path.abspath(output_dir)
+        signature = artifact_signature(output_dir)
+        bundle = self._bundles.get(key)
+        if bundle is None or bundle.signature != signature:
+            with self._lock:
+                bundle = self._bundles.get(key)
+                if bundle is None or bundle.signature != signature:
+                    logger.debug(f"Loading model bundle from {output_dir}")
+                    bundle = ModelBundle(output_dir, signature, mmap_mode=self.mmap_mode)
+                    self._bundles.pop(key, None)
+                    self._bundles[key] = bundle
+                    while len(self._bundles) > self.max_bundles:
+                        self._bundles.popitem(last=False)
+                    self._latest = bundle
+                    self.loads += 1
+        self.served[bundle.version] += 1
+        return bundle
+
+    def stats(self):
+        bundle = self._latest
+        return {
+            'version': bundle.version if bundle else None,
+            'compact': bundle.compact if bundle else None,
+            'loaded_at': bundle.loaded_at if bundle else None,
+            'resident': [resident.version for resident in list(self._bundles.values())],
+            'loads': self.loads,
+            'served': dict(self.served),
+        }
+
+
+model_holder = ModelHolder()
+
+
+def score_records(artifacts_dir, records):
+    """MicroBatcher scoring function: score clients against one model.
+
+    Each result is tagged with the model's version and input columns: (prediction, version,
+    feature_names).
+    """
+    bundle = model_holder.get(artifacts_dir)
+    return [
+        result if isinstance(result, Exception) else (result, bundle.version, bundle.feature_names)
+        for result in bundle.engine.predict_records(records)
+    ]
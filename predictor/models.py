@@ -1,3 +1,130 @@
+import uuid
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class TrainingRun(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(
+        max_length=30,
+        verbose_name="Status",
+        choices=[
+            ('queued', 'Na fila'),
+            ('running', 'Em execução'),
+            ('committed', 'Concluído'),
+            ('unchanged', 'Sem alterações'),
+            ('failed', 'Falhou'),
+        ],
+        default='running'
+    )
+    etapa = models.CharField(max_length=30, blank=True, verbose_name="Etapa")
+    dataset_url = models.URLField(max_length=500, verbose_name="URL do Dataset")
+    dataset_fingerprint = models.CharField(max_length=64, blank=True, verbose_name="Fingerprint do Dataset")
+    modo_treino = models.CharField(
+        max_length=20,
+        verbose_name="Modo de Treino",
+        choices=[
+            ('full', 'Completo'),
+            ('incremental', 'Incremental'),
+        ],
+        blank=True
+    )
+    motivo_refit = models.CharField(max_length=50, blank=True, verbose_name="Motivo do Treino Completo")
+    n_linhas = models.PositiveIntegerField(null=True, blank=True, verbose_name="Linhas do Dataset")
+    linhas_base = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Linhas no Último Treino Completo"
+    )
+    artifacts_dir = models.CharField(max_length=500, verbose_name="Diretório de Artefatos")
+    payload = models.JSONField(null=True, blank=True, verbose_name="Métricas")
+    chart_urls = models.JSONField(default=dict, blank=True, verbose_name="URLs dos Gráficos")
+    spans = models.JSONField(default=list, blank=True, verbose_name="Spans de Execução")
+    hiperparametros = models.JSONField(default=dict, blank=True, verbose_name="Hiperparâmetros")
+    erro = models.TextField(blank=True, verbose_name="Erro")
+    criado_em = models.DateTimeField(auto_now_add=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-criado_em']
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
+class MetricsSnapshot(models.Model):
+    """Dashboard payloads of a committed run, materialized once at training time."""
+    run = models.OneToOneField(
+        TrainingRun,
+        on_delete=models.CASCADE,
+        related_name='snapshot',
+        verbose_name="Treinamento"
+    )
+    metrics = models.JSONField(verbose_name="Métricas")
+    performance = models.JSONField(verbose_name="Desempenho")
+    stats = models.JSONField(verbose_name="Estatísticas")
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-criado_em']
+
+    def __str__(self):
+        return f"Snapshot {self.run_id}"
+
+
+class RunAggregate(models.Model):
+    """Per-run aggregates kept as a time series for trend queries (indexed on criado_em)."""
+    run = models.OneToOneField(
+        TrainingRun,
+        on_delete=models.CASCADE,
+        related_name='aggregate',
+        verbose_name="Treinamento"
+    )
+    total_previsoes = models.PositiveIntegerField(verbose_name="Total de Previsões")
+    conversoes_holding = models.PositiveIntegerField(verbose_name="Conversões em Holding")
+    clientes_risco_medio = models.PositiveIntegerField(verbose_name="Clientes com Risco Médio")
+    acuracia = models.FloatField(verbose_name="Acurácia")
+    criado_em = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['criado_em']
+
+    def __str__(self):
+        return f"Agregado {self.run_id} ({self.criado_em:%Y-%m-%d %H:%M})"
+
+
+class ClientScore(models.Model):
+    """Latest holding/churn scores of each user, written in bulk by `manage.py score_all`."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='score',
+        verbose_name="Usuário"
+    )
+    run = models.ForeignKey(
+        TrainingRun,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='scores',
+        verbose_name="Treinamento"
+    )
+    prob_holding = models.FloatField(db_index=True, verbose_name="Probabilidade de Holding (%)")
+    prob_churn = models.FloatField(db_index=True, verbose_name="Probabilidade de Churn (%)")
+    abriu_holding = models.BooleanField(verbose_name="Previsão de Holding")
+    risco_churn = models.CharField(
+        max_length=10,
+        choices=[
+            ('Baixo', 'Baixo'),
+            ('Médio', 'Médio'),
+        ],
+        db_index=True,
+        verbose_name="Risco de Churn"
+    )
+    atualizado_em = models.DateTimeField(verbose_name="Atualizado em")
+
+    class Meta:
+        ordering = ['-prob_churn']
+
+    def __str__(self):
+        return f"{self.user_id}: churn {self.prob_churn:.0f}% / holding {self.prob_holding:.0f}%"
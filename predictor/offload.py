@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Saturated(Exception):
+    """Raised when every slot of a BoundedExecutor is taken."""
+
+
+class BoundedExecutor:
+    """Run blocking calls from async views on a fixed thread pool, with a cap on queued work.
+
+    At most ``max_workers`` calls run at once and at most ``max_pending`` are accepted in total
+    (running or waiting); beyond that ``run`` raises Saturated right away, so an overloaded
+    worker sheds requests instead of letting their latency grow without bound. Threads rather
+    than processes: the model bundle is loaded once per process and NumPy releases the GIL
+    while scoring.
+    """
+
+    def __init__(self, max_workers=4, max_pending=256):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='predictor-async')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise Saturated(f"More than {self.max_pending} requests are waiting to be scored")
+        with self._lock:
+            self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
@@ -0,0 +1,92 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+def canonical_key(data, feature_names):
+    """Key for the fields of a client the model reads, or None if one of them is absent.
+
+    Other fields of the request do not split entries. Values are normalized the way
+    InferenceEngine.build_row reads them, so 35, 35.0 and "35" share an entry and None and ""
+    are both missing; anything that is not a number (Perfil_Risco) is kept as is.
+    """
+    values = []
+    for name in feature_names:
+        if name not in data:
+            return None
+        value = data[name]
+        if value is None or value == '':
+            value = None
+        else:
+            if not isinstance(value, (str, int, float, bool)):
+                value = str(value)
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        values.append(value)
+    return tuple(values)
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with TTL for single predictions.
+
+    Entries are scoped to a model version: the first lookup for a different version drops every
+    entry of the previous one, so a newly trained model is never answered from stale results.
+    """
+
+    def __init__(self, maxsize=4096, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, version, key):
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, version, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,183 @@
+import os
+import logging
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from .constants import SNAPSHOT_SECTIONS
+from .models import TrainingRun, MetricsSnapshot
+from .tracing import Tracer
+from .trends import DEFAULT_WINDOW, compute_trends, parse_window, record_aggregate
+
+
+logger = logging.getLogger(__name__)
+
+# cProfile output of a run trained with profile=True, in pstats format, inside its artifacts_dir.
+PROFILE_FILE = 'training.pstats'
+
+
+def to_builtin(value):
+    """Convert numpy scalars/arrays nested in a payload into JSON-friendly types."""
+    if isinstance(value, dict):
+        return {str(k): to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(v) for v in value]
+    if hasattr(value, 'tolist'):
+        # numpy arrays and scalars (checked by duck typing so numpy is not imported here)
+        return value.tolist()
+    return value
+
+
+def get_latest_run():
+    """Return the most recent committed training run, or None."""
+    return TrainingRun.objects.filter(status='committed').order_by('-concluido_em').first()
+
+
+def get_latest_snapshot(*fields):
+    """Return the metrics snapshot of the most recent committed run, or None.
+
+    ``fields`` limits the JSON columns loaded, e.g. ``get_latest_snapshot('stats')``.
+    """
+    snapshots = MetricsSnapshot.objects.filter(run__status='committed').order_by('-run__concluido_em')
+    if fields:
+        snapshots = snapshots.only('run_id', 'criado_em', *fields)
+    return snapshots.first()
+
+
+def create_run(cloudinary_url=None, output_dir=None, status='running'):
+    """Register a new training run and reserve its artifact directory."""
+    cloudinary_url = cloudinary_url or settings.PREDICTOR_DATASET_URL
+    output_dir = output_dir or settings.MEDIA_ROOT
+
+    run = TrainingRun(dataset_url=cloudinary_url, status=status)
+    run.artifacts_dir = os.path.join(output_dir, 'runs', str(run.id))
+    run.save()
+    return run
+
+
+def previous_run_info(run):
+    """What run_predictor needs to know about the latest committed run to train incrementally."""
+    previous = get_latest_run()
+    if previous is None or previous.id == run.id:
+        return None
+    return {
+        'artifacts_dir': previous.artifacts_dir,
+        'dataset_fingerprint': previous.dataset_fingerprint,
+        'n_rows': previous.n_linhas,
+        'base_rows': previous.linhas_base,
+        # Trees of the last full refit; None for RandomForestClassifier's default.
+        'base_trees': (previous.hiperparametros.get('holding') or {}).get('n_estimators'),
+    }
+
+
+def execute_run(run, full=False, profile=False, params=None):
+    """Train into the run's directory, recording each stage, and commit it to the registry.
+
+    The previous forests are grown on appended rows when possible; ``full`` forces a refit.
+    When the dataset did not change since the latest run, the run ends as 'unchanged' and
+    nothing is committed.
+    Timed spans of the pipeline are stored on the run; with ``profile`` a cProfile of the
+    training threads is also written to PROFILE_FILE in the run's directory.
+    ``params`` are the forests' hyperparameters per target (see search.py); by default those
+    of the latest committed run are kept.
+    """
+    from .incremental import DatasetUnchanged
+    from .v2churn_predictor import run_predictor
+    logger.debug(f"Starting training run {run.id}")
+
+    def on_stage(stage):
+        logger.debug(f"Training run {run.id}: {stage}")
+        run.etapa = stage
+        run.save(update_fields=['etapa'])
+
+    latest = get_latest_run()
+    latest_params = latest.hiperparametros if latest is not None else {}
+    if params is None:
+        params = latest_params
+    run.hiperparametros = params
+
+    if full:
+        full_refit_reason = 'requested'
+    elif not settings.PREDICTOR_INCREMENTAL:
+        full_refit_reason = 'incremental_disabled'
+    elif params != latest_params:
+        # Growing the previous forests would keep their hyperparameters.
+        full_refit_reason = 'params_changed'
+    else:
+        full_refit_reason = None
+    tracer = Tracer(profile=profile)
+    try:
+        with tracer.activate(), tracer.profiled():
+            result = run_predictor(
+                cloudinary_url=run.dataset_url,
+                output_dir=run.artifacts_dir,
+                on_stage=on_stage,
+                cache_dir=settings.PREDICTOR_DATASET_CACHE_DIR,
+                previous=previous_run_info(run),
+                full_refit_reason=full_refit_reason,
+                chunked_ingest_mb=settings.PREDICTOR_CHUNKED_INGEST_MB,
+                params=params
+            )
+    except DatasetUnchanged:
+        # Nothing to learn: the latest committed run stays the served model.
+        run.status = 'unchanged'
+        run.motivo_refit = 'no_new_rows'
+        run.spans = tracer.spans
+        run.concluido_em = timezone.now()
+        run.save(update_fields=['status', 'motivo_refit', 'spans', 'hiperparametros', 'concluido_em'])
+        logger.debug(f"Training run {run.id}: dataset unchanged, keeping the latest model")
+        return run
+    except Exception as e:
+        run.status = 'failed'
+        run.erro = str(e)
+        run.spans = tracer.spans
+        run.concluido_em = timezone.now()
+        run.save(update_fields=['status', 'erro', 'spans', 'hiperparametros', 'concluido_em'])
+        raise
+    finally:
+        if profile:
+            os.makedirs(run.artifacts_dir, exist_ok=True)
+            tracer.dump_profile(os.path.join(run.artifacts_dir, PROFILE_FILE))
+
+    run.dataset_fingerprint = result.pop('dataset_fingerprint')
+    training = result['training']
+    run.modo_treino = training['mode']
+    run.motivo_refit = training['reason']
+    run.n_linhas = training['n_rows']
+    run.linhas_base = training['base_rows']
+    sections = {section: to_builtin(result.pop(section)) for section in SNAPSHOT_SECTIONS}
+    run.payload = to_builtin(result)
+    run.spans = tracer.spans
+    run.status = 'committed'
+    run.concluido_em = timezone.now()
+    # The run only becomes the latest committed one together with its aggregates and snapshot.
+    with transaction.atomic():
+        run.save(update_fields=[
+            'dataset_fingerprint', 'modo_treino', 'motivo_refit', 'n_linhas', 'linhas_base',
+            'payload', 'spans', 'hiperparametros', 'status', 'concluido_em'
+        ])
+        aggregate = record_aggregate(run, sections['metrics'])
+        deltas = compute_trends(parse_window(DEFAULT_WINDOW), latest=aggregate)['deltas']
+        sections['metrics']['trends'] = {name: deltas[name] for name in ('predictions', 'conversions', 'risk')}
+        MetricsSnapshot.objects.create(run=run, **sections)
+    logger.debug(f"Committed training run {run.id}")
+    return run
+
+
+def train_model(cloudinary_url=None, output_dir=None, full=False, profile=False, params=None):
+    """Train a new model version synchronously."""
+    return execute_run(create_run(cloudinary_url, output_dir), full=full, profile=profile, params=params)
+
+
+def preload_model():
+    """Load the latest committed model up front, e.g. in the gunicorn master before it forks."""
+    from .model_cache import model_holder
+    try:
+        run = get_latest_run()
+        if run is not None:
+            bundle = model_holder.get(run.artifacts_dir)
+            logger.debug(f"Preloaded model {bundle.version}")
+    except Exception as e:
+        logger.warning(f"Could not preload model: {str(e)}")
+    finally:
+        # Forked workers must not inherit the master's database connection.
+        connections.close_all()
@@ -0,0 +1,110 @@
+import logging
+from itertools import islice
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from usuarios.models import CustomUser
+from patrimonio.models import Patrimonio
+from holding.models import Holding
+from .models import ClientScore
+
+
+logger = logging.getLogger(__name__)
+
+# The signup questionnaire's investment knowledge stands in for the risk profile.
+PERFIL_POR_CONHECIMENTO = {
+    'beginner': 'Conservador',
+    'intermediate': 'Moderado',
+    'advanced': 'Arrojado',
+}
+SCORE_FIELDS = ['run', 'prob_holding', 'prob_churn', 'abriu_holding', 'risco_churn', 'atualizado_em']
+
+
+def _per_user(queryset, aggregate, output_field):
+    """Correlated subquery aggregating a related table per user, avoiding join fan-out."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(user_id=OuterRef('pk')).order_by().values('user_id')
+            .annotate(value=aggregate).values('value'),
+            output_field=output_field
+        ),
+        Value(0, output_field=output_field)
+    )
+
+
+def user_rows(chunk_size=2000):
+    """Stream the fields needed to build each user's features, chunk_size rows per fetch."""
+    return CustomUser.objects.annotate(
+        valor_patrimonios=_per_user(Patrimonio.objects, Sum('valor'), DecimalField(max_digits=20, decimal_places=2)),
+        qtd_patrimonios=_per_user(Patrimonio.objects, Count('id'), IntegerField()),
+        qtd_holdings=_per_user(Holding.objects, Count('id'), IntegerField()),
+    ).order_by().values_list(
+        'id', 'data_nascimento', 'patrimonio', 'valor_patrimonios', 'qtd_patrimonios',
+        'qtd_holdings', 'conhecimento_investimento'
+    ).iterator(chunk_size=chunk_size)
+
+
+def age(birth_date, today):
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+
+def user_features(row, today, neutral_score):
+    """Map a user row to the model's features.
+
+    Users have no relationship score, so the training mean is used as a neutral value.
+    """
+    _, nascimento, patrimonio, valor_patrimonios, qtd_patrimonios, qtd_holdings, conhecimento = row
+    return {
+        'Idade': age(nascimento, today),
+        'Volume_Investimentos': float(patrimonio if patrimonio is not None else valor_patrimonios),
+        'Qtd_Servicos_Contratados': qtd_patrimonios + qtd_holdings,
+        'Score_Relacionamento': neutral_score,
+        'Perfil_Risco': PERFIL_POR_CONHECIMENTO.get(conhecimento, 'Conservador'),
+    }
+
+
+def check_profiles(bundle):
+    """Raise ValueError if the model's encoder does not know every profile users are mapped to."""
+    unknown = set(PERFIL_POR_CONHECIMENTO.values()) - set(bundle.le.classes_)
+    if unknown:
+        raise ValueError(f"Model {bundle.version} does not know the risk profiles {sorted(unknown)}")
+
+
+def score_users(run, bundle, chunk_size=2000):
+    """Score every user with the bundle's model in vectorized chunks and upsert ClientScore rows.
+
+    The profile mapping is checked up front, so a run never stops halfway with some chunks
+    already upserted. Returns the number of users scored.
+    """
+    check_profiles(bundle)
+    engine = bundle.engine
+    neutral_score = dict(zip(bundle.scaler.feature_names_in_, bundle.scaler.mean_))['Score_Relacionamento']
+    now = timezone.now()
+    today = timezone.localdate()
+    rows = user_rows(chunk_size)
+    total = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return total
+        X = engine.build_matrix([user_features(row, today, neutral_score) for row in chunk])
+        prob_h, prob_c = engine.predict_proba(X)
+        pred_h = engine.classes_h[prob_h.argmax(axis=1)]
+        pred_c = engine.classes_c[prob_c.argmax(axis=1)]
+        scores = [
+            ClientScore(
+                user_id=row[0],
+                run=run,
+                prob_holding=float(prob_h[i, 1] * 100),
+                prob_churn=float(prob_c[i, 1] * 100),
+                abriu_holding=bool(pred_h[i] == 1),
+                risco_churn='Médio' if pred_c[i] == 1 else 'Baixo',
+                atualizado_em=now,
+            )
+            for i, row in enumerate(chunk)
+        ]
+        ClientScore.objects.bulk_create(
+            scores, update_conflicts=True, unique_fields=['user'], update_fields=SCORE_FIELDS
+        )
+        total += len(scores)
+        logger.debug(f"Scored {total} users")
@@ -0,0 +1,118 @@
+import time
+import logging
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import HalvingRandomSearchCV
+from .forest import CompiledForest, compile_forest
+
+
+logger = logging.getLogger(__name__)
+
+SEARCH_SPACE = {
+    'n_estimators': [25, 50, 100, 200],
+    'max_depth': [None, 8, 12, 16, 24],
+    'min_samples_leaf': [1, 2, 5, 10],
+    'max_features': ['sqrt', 'log2', 0.5, None],
+}
+# Scoring of each target, as in train_and_evaluate_holding / train_and_evaluate_churn.
+TARGET_SCORING = {
+    'holding': ('Abriu_Holding', 'f1'),
+    'churn': ('Risco_Churn', 'f1_weighted'),
+}
+# Rows scored one at a time to measure single-prediction latency of a candidate.
+LATENCY_ROWS = 200
+
+
+def halving_search(X, y, scoring, n_candidates=24, factor=3, n_jobs=-1, random_state=42):
+    """Successive halving over SEARCH_SPACE: every round keeps the best 1/factor on factor times the rows.
+
+    The first round is sized so the last one sees every row of X.
+    """
+    search = HalvingRandomSearchCV(
+        RandomForestClassifier(random_state=random_state, n_jobs=1), SEARCH_SPACE,
+        n_candidates=n_candidates, factor=factor, resource='n_samples', min_resources='exhaust', scoring=scoring,
+        cv=3, n_jobs=n_jobs, random_state=random_state, refit=False
+    )
+    return search.fit(X, y)
+
+
+def finalists(search, limit=8):
+    """Parameters of the best candidates by the score of the last round each one reached."""
+    results = search.cv_results_
+    latest = {}
+    for i, params in enumerate(results['params']):
+        key = repr(sorted(params.items()))
+        # Later rounds overwrite earlier ones: rows are ordered by iteration.
+        latest[key] = (results['iter'][i], results['mean_test_score'][i], params)
+    ranked = sorted(latest.values(), key=lambda item: (-item[0], -np.nan_to_num(item[1], nan=-np.inf)))
+    return [params for _, _, params in ranked[:limit]]
+
+
+def fit_candidate(params, X, y, scoring, train, test, random_state=42):
+    """Refit a candidate on train; returns (params, forest, holdout score, fit seconds)."""
+    rf = RandomForestClassifier(random_state=random_state, n_jobs=1, **params)
+    start = time.perf_counter()
+    rf.fit(X.iloc[train], y.iloc[train])
+    fit_s = time.perf_counter() - start
+    return params, rf, float(get_scorer(scoring)(rf, X.iloc[test], y.iloc[test])), fit_s
+
+
+def serving_cost(rf, rows):
+    """Single-row p50 latency (ms) and size (KB) of the compiled forest the inference engine loads."""
+    forest = CompiledForest(compile_forest(rf))
+    timings = np.empty(len(rows))
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        forest.predict_proba(rows[i:i + 1])
+        timings[i] = time.perf_counter() - start
+    return float(np.percentile(timings, 50) * 1000), forest.nbytes / 1024
+
+
+def pareto_front(candidates):
+    """Flag candidates no other one beats on score, latency and size at once."""
+    for candidate in candidates:
+        candidate['pareto'] = not any(
+            other['score'] >= candidate['score'] and other['latency_ms'] <= candidate['latency_ms']
+            and other['size_kb'] <= candidate['size_kb']
+            and (other['score'], other['latency_ms'], other['size_kb'])
+            != (candidate['score'], candidate['latency_ms'], candidate['size_kb'])
+            for other in candidates
+        )
+    return [candidate for candidate in candidates if candidate['pareto']]
+
+
+def choose(candidates, max_score_drop=0.01):
+    """The fastest Pareto candidate scoring within max_score_drop of the best one."""
+    front = pareto_front(candidates)
+    best = max(candidate['score'] for candidate in front)
+    eligible = [candidate for candidate in front if candidate['score'] >= best - max_score_drop]
+    return min(eligible, key=lambda candidate: (candidate['latency_ms'], candidate['size_kb']))
+
+
+def search_target(X, y, scoring, train, test, n_candidates=24, factor=3, n_finalists=8, max_score_drop=0.01,
+                  n_jobs=-1):
+    """Search hyperparameters for one target; returns the evaluated finalists and the chosen one."""
+    logger.debug(f"Searching hyperparameters for {y.name} ({n_candidates} candidates)")
+    search = halving_search(X.iloc[train], y.iloc[train], scoring, n_candidates, factor, n_jobs)
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(fit_candidate)(params, X, y, scoring, train, test)
+        for params in finalists(search, n_finalists)
+    )
+    # Timed one after the other, so latencies are not skewed by concurrent fits.
+    rows = X.iloc[test[:LATENCY_ROWS]].to_numpy(dtype=np.float64)
+    candidates = []
+    for params, rf, score, fit_s in fitted:
+        latency_ms, size_kb = serving_cost(rf, rows)
+        candidates.append({'params': params, 'score': score, 'latency_ms': latency_ms, 'size_kb': size_kb,
+                           'fit_s': fit_s})
+    chosen = choose(candidates, max_score_drop)
+    return {
+        'scoring': scoring,
+        'rounds': int(search.n_iterations_),
+        'rows_per_round': [int(n) for n in search.n_resources_],
+        'candidates': candidates,
+        'chosen': chosen,
+    }
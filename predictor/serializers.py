@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from .models import TrainingRun, MetricsSnapshot
+from .constants import TRAINING_STAGES
 
 class PredictionSerializer(serializers.Serializer):
     holding_report = serializers.DictField()
@@ -12,4 +14,49 @@ class PredictionSerializer(serializers.Serializer):
     relatorio_holding_url = serializers.CharField()
     metrics = serializers.DictField()
     performance = serializers.DictField()
-    stats = serializers.DictField()
\ No newline at end of file
+    stats = serializers.DictField()
+
+
+class TrainingRunSerializer(serializers.ModelSerializer):
+    stages = serializers.SerializerMethodField()
+    metrics = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TrainingRun
+        fields = [
+            'id', 'status', 'etapa', 'stages', 'dataset_url', 'dataset_fingerprint',
+            'modo_treino', 'motivo_refit', 'n_linhas', 'linhas_base', 'hiperparametros',
+            'metrics', 'spans', 'erro', 'criado_em', 'concluido_em'
+        ]
+        read_only_fields = fields
+
+    def get_stages(self, obj):
+        if obj.status == 'committed':
+            done = len(TRAINING_STAGES)
+        elif obj.etapa in TRAINING_STAGES:
+            # A run that found its dataset unchanged finished its last stage and skips the rest.
+            done = TRAINING_STAGES.index(obj.etapa) + (obj.status == 'unchanged')
+        else:
+            done = 0
+        stages = []
+        for i, stage in enumerate(TRAINING_STAGES):
+            if i < done:
+                state = 'done'
+            elif i == done and obj.status == 'running' and obj.etapa == stage:
+                state = 'running'
+            elif i == done and obj.status == 'failed' and obj.etapa == stage:
+                state = 'failed'
+            elif obj.status == 'unchanged':
+                state = 'skipped'
+            else:
+                state = 'pending'
+            stages.append({'stage': stage, 'status': state})
+        return stages
+
+    def get_metrics(self, obj):
+        if obj.status != 'committed':
+            return None
+        try:
+            return obj.snapshot.metrics
+        except MetricsSnapshot.DoesNotExist:
+            return None
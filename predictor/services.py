@@ -0,0 +1,127 @@
+"""Thin facade used by the views.
+
+Importing this module is cheap: pandas, scikit-learn, matplotlib and the model artifacts are
+only loaded the first time a function that needs them is called, so workers that never serve
+the predictor never pay for the ML stack.
+"""
+import logging
+import threading
+from django.conf import settings
+from .batching import MicroBatcher
+from .offload import BoundedExecutor
+from .prediction_cache import PredictionCache, canonical_key
+
+
+logger = logging.getLogger(__name__)
+
+_batcher = None
+_batcher_lock = threading.Lock()
+_offload = None
+
+prediction_cache = PredictionCache(maxsize=settings.PREDICTOR_CACHE_SIZE, ttl=settings.PREDICTOR_CACHE_TTL)
+# Input columns of each model version, learned from its first prediction; the cache key needs
+# them before scoring, and web workers that forward to the inference server never load the model.
+_feature_names = {}
+
+
+def get_batcher():
+    """Process-wide MicroBatcher for in-process single predictions, created on first use."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                from .model_cache import score_records
+                _batcher = MicroBatcher(score_records, max_batch=settings.PREDICTOR_BATCH_MAX_ROWS,
+                                        window=settings.PREDICTOR_BATCH_WINDOW_MS / 1000)
+    return _batcher
+
+
+def get_offload():
+    """Process-wide BoundedExecutor the async views run scoring and ORM calls on, created on first use."""
+    global _offload
+    if _offload is None:
+        with _batcher_lock:
+            if _offload is None:
+                _offload = BoundedExecutor(max_workers=settings.PREDICTOR_ASYNC_WORKERS,
+                                           max_pending=settings.PREDICTOR_ASYNC_MAX_PENDING)
+    return _offload
+
+
+def get_bundle(artifacts_dir):
+    from .model_cache import model_holder
+    return model_holder.get(artifacts_dir)
+
+
+def model_status():
+    import sys
+    if 'predictor.model_cache' in sys.modules:
+        from .model_cache import model_holder
+        stats = model_holder.stats()
+    else:
+        stats = {'version': None, 'loaded_at': None, 'loads': 0, 'served': {}}
+    if _batcher is not None:
+        stats['batching'] = _batcher.stats()
+    if _offload is not None:
+        stats['offload'] = _offload.stats()
+    stats['cache'] = prediction_cache.stats()
+    return stats
+
+
+def predict_single(data, bundle):
+    from .v2churn_predictor import predict_single
+    return predict_single(data, bundle=bundle)
+
+
+def predict(data, run):
+    """Score one client with the run's model; returns (prediction, model_version).
+
+    Repeated profiles are answered from the prediction cache, which is scoped to the model
+    version on disk and keyed by the fields that version reads (see canonical_key).
+    """
+    if settings.PREDICTOR_CACHE_SIZE <= 0:
+        return _score(data, run)[:2]
+    from .artifacts import artifact_signature, signature_version
+    version = signature_version(run.artifacts_dir, artifact_signature(run.artifacts_dir))
+    feature_names = _feature_names.get(version)
+    key = canonical_key(data, feature_names) if feature_names else None
+    cached = prediction_cache.get(version, key) if key is not None else None
+    if cached is None:
+        result, scored_version, feature_names = _score(data, run)
+        cached = (result, scored_version)
+        # Only cache results of the version looked up, not of a model swapped in meanwhile.
+        if scored_version == version and feature_names:
+            _feature_names[version] = list(feature_names)
+            key = canonical_key(data, feature_names)
+            if key is not None:
+                prediction_cache.put(version, key, cached)
+    return cached
+
+
+def _score(data, run):
+    """Returns (prediction, model_version, feature_names).
+
+    Uses the inference server when PREDICTOR_INFERENCE_SOCKET is set and scores in this process
+    if it is down or too slow; in-process, concurrent calls are coalesced by the MicroBatcher
+    when PREDICTOR_MICROBATCH is on.
+    """
+    if settings.PREDICTOR_INFERENCE_SOCKET:
+        from .ipc import predict_remote
+        try:
+            return predict_remote(settings.PREDICTOR_INFERENCE_SOCKET, run.artifacts_dir, dict(data.items()),
+                                  timeout=settings.PREDICTOR_INFERENCE_TIMEOUT)
+        except OSError as e:
+            logger.warning(f"Inference server unavailable ({str(e)}), scoring in-process")
+    if settings.PREDICTOR_MICROBATCH:
+        return get_batcher().submit(run.artifacts_dir, data)
+    bundle = get_bundle(run.artifacts_dir)
+    return predict_single(data, bundle), bundle.version, bundle.feature_names
+
+
+def predict_batch(records, bundle):
+    from .v2churn_predictor import predict_batch
+    return predict_batch(records, bundle=bundle)
+
+
+def read_csv(file):
+    import pandas as pd
+    return pd.read_csv(file)
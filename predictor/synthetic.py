@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+PERFIS_RISCO = ['Conservador', 'Moderado', 'Arrojado']
+
+
+def generate_clients(n_rows, seed=42, perfis=PERFIS_RISCO, missing_rate=0.02):
+    """Generate a synthetic client base with the same schema as the training CSV."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Id': np.arange(1, n_rows + 1),
+        'Idade': rng.integers(18, 80, n_rows).astype(float),
+        'Volume_Investimentos': rng.lognormal(11, 1, n_rows).round(2),
+        'Qtd_Servicos_Contratados': rng.integers(1, 10, n_rows).astype(float),
+        'Score_Relacionamento': rng.integers(0, 100, n_rows).astype(float),
+        'Perfil_Risco': rng.choice(list(perfis), n_rows).astype(object),
+    })
+    df['Abriu_Holding'] = (
+        ((df['Volume_Investimentos'] > 80000) & (rng.random(n_rows) < 0.8)) | (rng.random(n_rows) < 0.1)
+    ).astype(int)
+    df['Risco_Churn'] = (
+        ((df['Score_Relacionamento'] < 40) & (rng.random(n_rows) < 0.7)) | (rng.random(n_rows) < 0.1)
+    ).astype(int)
+
+    if missing_rate:
+        for col in ['Idade', 'Volume_Investimentos', 'Perfil_Risco']:
+            df.loc[rng.random(n_rows) < missing_rate, col] = np.nan
+    return df
+
+
+def client_records(n_rows, seed=42, perfis=PERFIS_RISCO):
+    """Feature dicts shaped like a POST /api/predict/ body."""
+    df = generate_clients(n_rows, seed=seed, perfis=perfis, missing_rate=0)
+    return df.drop(columns=['Id', 'Abriu_Holding', 'Risco_Churn']).to_dict('records')
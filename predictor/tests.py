@@ -1,3 +1,674 @@
-from django.test import TestCase
+import os
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+from http.server import ThreadingHTTPServer
+from unittest import mock
+import joblib
+import numpy as np
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+from .artifacts import ARTIFACT_FILES, COMPACT_FILE, artifact_signature, signature_version
+from .batching import MicroBatcher
+from .compact import compact_forest
+from .constants import TRAINING_STAGES
+from .forest import MISSING_ARRAY, CompiledForest, compile_forest
+from .management.commands.bench_predictor import QuietHandler
+from .incremental import HOLDOUT_FILE, MODEL_FILES, fingerprint_rows, plan_training, row_hashes
+from .ingest import FEATURES_FILE, preprocess_streamed, stream_dataset
+from .prediction_cache import PredictionCache, canonical_key
+from .offload import Saturated
+from .registry import get_latest_run, train_model
+from .search import choose, pareto_front
+from .synthetic import client_records, generate_clients
+from .trends import parse_window
 
-# Create your tests here.
+FEATURES = ['Idade', 'Volume_Investimentos', 'Qtd_Servicos_Contratados', 'Score_Relacionamento']
+
+
+def fitted_forest(n_rows=600, **params):
+    """A small forest on synthetic clients, with the held-out feature rows to score."""
+    df = generate_clients(n_rows, missing_rate=0)
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    params = {'n_estimators': 10, 'random_state': 0, 'n_jobs': 1, **params}
+    rf = RandomForestClassifier(**params).fit(X[:400], df['Abriu_Holding'][:400])
+    return rf, X[400:]
+
+
+class TrainedModelTestCase(TestCase):
+    """Trains a small committed run on synthetic clients, served over HTTP like the real dataset."""
+    forest_params = {'holding': {'n_estimators': 10}, 'churn': {'n_estimators': 10}}
+
+    @classmethod
+    def setUpClass(cls):
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        cls.media_root = tmp.name
+        overridden = override_settings(
+            MEDIA_ROOT=tmp.name, PREDICTOR_DATASET_CACHE_DIR=os.path.join(tmp.name, 'datasets')
+        )
+        overridden.enable()
+        cls.addClassCleanup(overridden.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        generate_clients(1000).to_csv(os.path.join(cls.media_root, 'clientes.csv'), index=False)
+        cls.training_run = cls.train()
+        cls.records = client_records(20, seed=7)
+
+    @classmethod
+    @contextmanager
+    def serving(cls, filename='clientes.csv'):
+        """Serve media_root over HTTP; yields the URL of filename."""
+        server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=cls.media_root))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            yield f"http://127.0.0.1:{server.server_port}/{filename}"
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    @classmethod
+    def train(cls, filename='clientes.csv', **kwargs):
+        """Run train_model on a CSV in media_root."""
+        with cls.serving(filename) as url:
+            return train_model(url, params=kwargs.pop('params', cls.forest_params), **kwargs)
+
+
+def make_user(email, **extra_fields):
+    """A user with every required field filled in; ``extra_fields`` override them."""
+    from usuarios.models import CustomUser
+    fields = {
+        'nome': 'Ana', 'sobrenome': 'Silva', 'telefone': '11999999999', 'cpf': email[:14],
+        'data_nascimento': '1990-01-01', 'cep': '01000-000', 'rua': 'Rua A', 'numero': '1',
+        'bairro': 'Centro', 'cidade': 'São Paulo', 'estado': 'SP', 'renda_mensal': 5000,
+        **extra_fields,
+    }
+    return CustomUser.objects.create_user(email, 'senha-teste', **fields)
+
+
+def bearer(user):
+    from rest_framework_simplejwt.tokens import AccessToken
+    return {'HTTP_AUTHORIZATION': f"Bearer {AccessToken.for_user(user)}"}
+
+
+class CompiledForestTests(SimpleTestCase):
+    def test_matches_predict_proba(self):
+        rf, X = fitted_forest(min_samples_leaf=5)
+        forest = CompiledForest(compile_forest(rf))
+        np.testing.assert_array_equal(forest.predict_proba(X), rf.predict_proba(X))
+
+    def test_matches_predict_proba_with_impure_leaves(self):
+        # Leaves that are not pure make the sum depend on the order the trees are added in.
+        rf, X = fitted_forest(n_estimators=40, max_depth=8, min_samples_leaf=10)
+        forest = CompiledForest(compile_forest(rf))
+        np.testing.assert_array_equal(forest.predict_proba(X), rf.predict_proba(X))
+
+    def test_missing_values_follow_sklearn(self):
+        rf, X = fitted_forest()
+        X[::3, 1] = np.nan
+        X[::5, 0] = np.nan
+        forest = CompiledForest(compile_forest(rf))
+        np.testing.assert_array_equal(forest.predict_proba(X), rf.predict_proba(X))
+
+    def test_rejects_missing_values_without_routing(self):
+        rf, X = fitted_forest()
+        arrays = compile_forest(rf)
+        del arrays[MISSING_ARRAY]
+        X[0, 1] = np.nan
+        with self.assertRaises(ValueError):
+            CompiledForest(arrays).predict_proba(X)
+
+
+class CompactForestTests(SimpleTestCase):
+    def test_unpruned_matches_predict_proba(self):
+        rf, X = fitted_forest(min_samples_leaf=5)
+        X[::4, 1] = np.nan
+        compact = compact_forest(rf)
+        self.assertEqual(compact['threshold'].dtype, np.float32)
+        self.assertEqual(compact['children'].dtype, np.min_scalar_type(len(compact['is_leaf']) - 1))
+        np.testing.assert_allclose(CompiledForest(compact).predict_proba(X), rf.predict_proba(X), rtol=0, atol=1e-6)
+
+    def test_depth_cap(self):
+        rf, X = fitted_forest()
+        compact = compact_forest(rf, max_depth=3)
+        self.assertLessEqual(int(compact['depth']), 3)
+        proba = CompiledForest(compact).predict_proba(X)
+        np.testing.assert_allclose(proba.sum(axis=1), 1.0, rtol=1e-6)
+
+    def test_ccp_alpha_prunes_nodes(self):
+        rf, _ = fitted_forest()
+        unpruned, pruned = compact_forest(rf), compact_forest(rf, ccp_alpha=0.01)
+        self.assertLess(len(pruned['is_leaf']), len(unpruned['is_leaf']))
+
+
+class ParseWindowTests(SimpleTestCase):
+    def test_units(self):
+        self.assertEqual(parse_window('24h'), timedelta(hours=24))
+        self.assertEqual(parse_window(' 7d '), timedelta(days=7))
+        self.assertEqual(parse_window('4w'), timedelta(weeks=4))
+
+    def test_rejects_invalid_and_huge_windows(self):
+        for value in ('0d', '7x', 'd', '3651d', '99999999999w'):
+            with self.assertRaises(ValueError):
+                parse_window(value)
+
+
+class ParetoFrontTests(SimpleTestCase):
+    def candidates(self):
+        return [
+            {'name': 'accurate', 'score': 0.90, 'latency_ms': 2.0, 'size_kb': 100},
+            {'name': 'tie', 'score': 0.90, 'latency_ms': 2.0, 'size_kb': 100},
+            {'name': 'fast', 'score': 0.88, 'latency_ms': 1.0, 'size_kb': 50},
+            {'name': 'dominated', 'score': 0.85, 'latency_ms': 1.5, 'size_kb': 60},
+            {'name': 'small', 'score': 0.80, 'latency_ms': 3.0, 'size_kb': 10},
+        ]
+
+    def test_front_drops_dominated_candidates_and_keeps_ties(self):
+        front = pareto_front(self.candidates())
+        self.assertEqual([candidate['name'] for candidate in front], ['accurate', 'tie', 'fast', 'small'])
+
+    def test_choose_takes_the_fastest_within_the_score_drop(self):
+        self.assertEqual(choose(self.candidates(), max_score_drop=0.01)['name'], 'accurate')
+        self.assertEqual(choose(self.candidates(), max_score_drop=0.05)['name'], 'fast')
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_coalesces_requests_queued_while_scoring(self):
+        started, release, calls = threading.Event(), threading.Event(), []
+
+        def score_batch(key, items):
+            calls.append((key, list(items)))
+            started.set()
+            release.wait(5)
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(score_batch, max_batch=3)
+        results = {}
+
+        def submit(item):
+            results[item] = batcher.submit('model', item, timeout=5)
+
+        first = threading.Thread(target=submit, args=(0,))
+        first.start()
+        started.wait(5)
+        # Queued while the first batch is being scored: collected together, max_batch at a time.
+        others = [threading.Thread(target=submit, args=(i,)) for i in range(1, 5)]
+        for thread in others:
+            thread.start()
+        while batcher._queue.qsize() < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in [first] + others:
+            thread.join(5)
+
+        self.assertEqual(results, {i: i * 2 for i in range(5)})
+        self.assertEqual([len(items) for _, items in calls], [1, 3, 1])
+        self.assertEqual(batcher.stats()['items'], 5)
+
+    def test_groups_by_key(self):
+        batcher = MicroBatcher(lambda key, items: [(key, item) for item in items])
+        self.assertEqual(batcher.submit('a', 1, timeout=5), ('a', 1))
+        self.assertEqual(batcher.submit('b', 2, timeout=5), ('b', 2))
+
+    def test_errors_reach_only_their_caller(self):
+        def score_batch(key, items):
+            return [ValueError(item) if item < 0 else item for item in items]
+
+        batcher = MicroBatcher(score_batch)
+        self.assertEqual(batcher.submit('model', 1, timeout=5), 1)
+        with self.assertRaises(ValueError):
+            batcher.submit('model', -1, timeout=5)
+
+    def test_failed_batch_raises_in_every_caller(self):
+        def score_batch(key, items):
+            raise RuntimeError('model unavailable')
+
+        batcher = MicroBatcher(score_batch)
+        with self.assertRaises(RuntimeError):
+            batcher.submit('model', 1, timeout=5)
+
+    def test_wrong_number_of_results_fails_the_group(self):
+        batcher = MicroBatcher(lambda key, items: [])
+        # Raised right away rather than leaving the caller to time out.
+        with self.assertRaises(RuntimeError):
+            batcher.submit('model', 1, timeout=5)
+
+
+class PredictionCacheTests(SimpleTestCase):
+    def test_canonical_key_normalizes_numbers_and_order(self):
+        a = {'Idade': 35, 'Perfil_Risco': 'Moderado'}
+        b = {'Perfil_Risco': 'Moderado', 'Idade': '35.0'}
+        self.assertEqual(canonical_key(a, ['Idade', 'Perfil_Risco']), canonical_key(b, ['Idade', 'Perfil_Risco']))
+
+    def test_canonical_key_only_reads_model_inputs(self):
+        features = ['Idade', 'Perfil_Risco']
+        a = {'Idade': None, 'Perfil_Risco': 'Moderado', 'nome': 'Ana'}
+        b = {'Idade': '', 'Perfil_Risco': 'Moderado', 'nome': 'Bia'}
+        self.assertEqual(canonical_key(a, features), canonical_key(b, features))
+        self.assertIsNone(canonical_key({'Perfil_Risco': 'Moderado'}, features))
+
+    def test_lru_eviction(self):
+        cache = PredictionCache(maxsize=2)
+        cache.put('v1', 'a', 1)
+        cache.put('v1', 'b', 2)
+        cache.get('v1', 'a')
+        cache.put('v1', 'c', 3)
+        self.assertEqual(cache.get('v1', 'a'), 1)
+        self.assertIsNone(cache.get('v1', 'b'))
+        self.assertEqual(cache.get('v1', 'c'), 3)
+
+    def test_entries_expire(self):
+        cache = PredictionCache(ttl=10)
+        with mock.patch('predictor.prediction_cache.time.monotonic', return_value=100.0):
+            cache.put('v1', 'a', 1)
+        with mock.patch('predictor.prediction_cache.time.monotonic', return_value=109.0):
+            self.assertEqual(cache.get('v1', 'a'), 1)
+        with mock.patch('predictor.prediction_cache.time.monotonic', return_value=111.0):
+            self.assertIsNone(cache.get('v1', 'a'))
+
+    def test_new_version_invalidates(self):
+        cache = PredictionCache()
+        cache.put('run:aaaa', 'a', 1)
+        self.assertIsNone(cache.get('run:bbbb', 'a'))
+        self.assertIsNone(cache.get('run:aaaa', 'a'))
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+    def test_version_changes_when_artifacts_are_swapped(self):
+        with tempfile.TemporaryDirectory() as run_dir:
+            for filename in ARTIFACT_FILES.values():
+                open(os.path.join(run_dir, filename), 'wb').close()
+            before = signature_version(run_dir, artifact_signature(run_dir))
+            with open(os.path.join(run_dir, COMPACT_FILE), 'wb') as f:
+                f.write(b'compact')
+            after = signature_version(run_dir, artifact_signature(run_dir))
+        self.assertNotEqual(before, after)
+        self.assertEqual(before.split(':')[0], after.split(':')[0])
+
+    def test_disabled(self):
+        cache = PredictionCache(maxsize=0)
+        cache.put('v1', 'a', 1)
+        self.assertIsNone(cache.get('v1', 'a'))
+
+
+class PlanTrainingTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.previous_dir = tmp.name
+        self.base = generate_clients(1000, missing_rate=0)
+        for filename in MODEL_FILES:
+            joblib.dump(None, os.path.join(self.previous_dir, filename))
+        joblib.dump(LabelEncoder().fit(self.base['Perfil_Risco']), os.path.join(self.previous_dir, 'label_encoder.pkl'))
+        np.save(os.path.join(self.previous_dir, HOLDOUT_FILE), np.arange(800, 1000))
+        self.previous = {
+            'artifacts_dir': self.previous_dir,
+            'dataset_fingerprint': fingerprint_rows(row_hashes(self.base)),
+            'n_rows': 1000,
+            'base_rows': 1000,
+        }
+
+    def appended(self, n_rows):
+        extra = generate_clients(n_rows, seed=7, missing_rate=0)
+        extra['Id'] += len(self.base)
+        return pd.concat([self.base, extra], ignore_index=True)
+
+    def plan(self, df, **kwargs):
+        return plan_training(df, row_hashes(df), **kwargs)
+
+    def test_full_refits(self):
+        self.assertEqual(self.plan(self.base)['reason'], 'no_previous_model')
+        self.assertEqual(self.plan(self.base, previous=self.previous, full_refit_reason='requested')['reason'],
+                         'requested')
+        self.assertEqual(self.plan(self.appended(600), previous=self.previous)['reason'], 'refit_window_exceeded')
+
+        changed = self.appended(200)
+        changed.loc[0, 'Idade'] += 1
+        plan = self.plan(changed, previous=self.previous)
+        self.assertEqual((plan['mode'], plan['reason']), ('full', 'dataset_changed'))
+        self.assertEqual(plan['base_rows'], len(changed))
+
+    def test_unchanged(self):
+        plan = self.plan(self.base, previous=self.previous)
+        self.assertEqual((plan['mode'], plan['reason']), ('unchanged', 'no_new_rows'))
+
+    def test_small_delta_is_held_out(self):
+        plan = self.plan(self.appended(4), previous=self.previous)
+        self.assertEqual((plan['mode'], plan['n_new_trees']), ('incremental', 0))
+        self.assertEqual(len(plan['train']), 0)
+        self.assertEqual(set(plan['test']), set(range(800, 1004)))
+
+    def test_incremental(self):
+        df = self.appended(200)
+        plan = self.plan(df, previous=self.previous)
+        self.assertEqual(plan['mode'], 'incremental')
+        self.assertEqual((plan['n_rows'], plan['base_rows'], plan['n_new_trees']), (1200, 1000, 20))
+        train, test = set(plan['train']), set(plan['test'])
+        self.assertFalse(train & test)
+        self.assertEqual(train | (test - set(range(800, 1000))), set(range(1000, 1200)))
+        self.assertTrue(set(range(800, 1000)) <= test)
+
+        tuned = self.plan(df, previous={**self.previous, 'base_trees': 25})
+        self.assertEqual(tuned['n_new_trees'], 5)
+
+    def test_missing_previous_artifacts(self):
+        os.remove(os.path.join(self.previous_dir, HOLDOUT_FILE))
+        self.assertEqual(self.plan(self.appended(200), previous=self.previous)['reason'], 'previous_artifacts_missing')
+
+
+class StreamedIngestTests(SimpleTestCase):
+    def test_matches_in_memory_preprocessing(self):
+        from .v2churn_predictor import _load_in_memory
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, 'clientes.csv')
+            generate_clients(2500, missing_rate=0.05).to_csv(csv_path, index=False)
+            X, y, le, scaler, fingerprint, _ = _load_in_memory(csv_path, lambda stage: None, None, None)
+
+            # Several chunks, including a short last one.
+            dataset = stream_dataset(csv_path, os.path.join(tmp_dir, 'work'), chunk_rows=700)
+            self.assertEqual(fingerprint_rows(dataset.hashes), fingerprint)
+            streamed_le, streamed_scaler = preprocess_streamed(dataset, chunk_rows=700)
+            dataset.unlink()
+            self.assertFalse(os.path.exists(os.path.join(tmp_dir, 'work', FEATURES_FILE)))
+
+            streamed = dataset.features_frame()
+            self.assertEqual(list(streamed.columns), list(X.columns))
+            self.assertEqual(list(streamed_le.classes_), list(le.classes_))
+            np.testing.assert_allclose(streamed_scaler.mean_, scaler.mean_, rtol=1e-6)
+            np.testing.assert_allclose(streamed_scaler.scale_, scaler.scale_, rtol=1e-6)
+            np.testing.assert_array_equal(streamed.to_numpy(), X.to_numpy(dtype=np.float32))
+            np.testing.assert_array_equal(dataset.labels[list(y.columns)].to_numpy(), y.to_numpy())
+
+    def test_reuses_given_encoder_and_scaler(self):
+        from .v2churn_predictor import _load_in_memory
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, 'clientes.csv')
+            generate_clients(1000).to_csv(csv_path, index=False)
+            _, _, le, scaler, _, _ = _load_in_memory(csv_path, lambda stage: None, None, None)
+            dataset = stream_dataset(csv_path, os.path.join(tmp_dir, 'work'), chunk_rows=300)
+            self.assertEqual(preprocess_streamed(dataset, le, scaler, chunk_rows=300), (le, scaler))
+            dataset.unlink()
+
+
+class PredictorViewTests(TrainedModelTestCase):
+    def test_missing_numeric_values_are_scored_as_nan(self):
+        from .v2churn_predictor import predict_single
+        for missing in (None, ''):
+            data = {**self.records[0], 'Idade': missing, 'Score_Relacionamento': missing}
+            response = self.client.post('/api/predict/', data, content_type='application/json')
+            self.assertEqual(response.status_code, 200, response.content)
+            expected = predict_single({**data, 'Idade': np.nan, 'Score_Relacionamento': np.nan},
+                                      self.training_run.artifacts_dir)
+            self.assertEqual(response.json()['probabilidades'], expected['probabilidades'])
+
+    def assert_matches_single_predictions(self, response):
+        from .v2churn_predictor import predict_single
+        self.assertEqual(response.status_code, 200, response.content)
+        results = response.json()
+        self.assertEqual(len(results), len(self.records))
+        for result, record in zip(results, self.records):
+            expected = predict_single(record, self.training_run.artifacts_dir)
+            self.assertEqual(result.keys(), expected.keys())
+            self.assertEqual((result['abriu_holding'], result['risco_churn']),
+                             (expected['abriu_holding'], expected['risco_churn']))
+            for name, probability in expected['probabilidades'].items():
+                self.assertAlmostEqual(result['probabilidades'][name], probability)
+
+    def test_batch_json_matches_single_predictions_in_order(self):
+        response = self.client.post('/api/predict/batch/', self.records, content_type='application/json')
+        self.assert_matches_single_predictions(response)
+
+    def test_batch_csv_matches_single_predictions_in_order(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        csv = pd.DataFrame(self.records).to_csv(index=False).encode()
+        response = self.client.post('/api/predict/batch/', {'file': SimpleUploadedFile('clientes.csv', csv)})
+        self.assert_matches_single_predictions(response)
+
+
+@mock.patch('predictor.charts.connections', mock.Mock())
+@mock.patch('predictor.charts._upload_executor', mock.Mock(submit=lambda fn, *args: fn(*args)))
+class ChartUploadTests(TrainedModelTestCase):
+    def test_failed_upload_is_retried_on_the_next_access(self):
+        from .charts import get_chart
+        run = self.training_run
+        urls = [Exception('offline'), 'https://res.cloudinary.com/matriz_holding.png']
+        with mock.patch('predictor.v2churn_predictor.upload_image_to_cloudinary', side_effect=urls) as upload:
+            with self.assertLogs('predictor.charts', 'ERROR'):
+                get_chart(run, 'matriz_holding')
+            run.refresh_from_db()
+            self.assertNotIn('matriz_holding', run.chart_urls)
+            get_chart(run, 'matriz_holding')
+            run.refresh_from_db()
+            self.assertEqual(run.chart_urls['matriz_holding'], urls[1])
+            get_chart(run, 'matriz_holding')
+        self.assertEqual(upload.call_count, 2)
+
+
+class ModelBundleTests(TrainedModelTestCase):
+    def test_estimators_are_loaded_for_large_batches_only(self):
+        from .inference import COMPILED_MAX_ROWS
+        from .model_cache import ModelBundle
+        output_dir = self.training_run.artifacts_dir
+        bundle = ModelBundle(output_dir, artifact_signature(output_dir), compact=False)
+        records = client_records(COMPILED_MAX_ROWS + 1, seed=3, perfis=bundle.le.classes_)
+        with mock.patch.object(bundle, 'load_estimators', wraps=bundle.load_estimators) as load:
+            engine = type(bundle.engine)(bundle)
+            small = engine.predict_records(records[:COMPILED_MAX_ROWS])
+            load.assert_not_called()
+            large = engine.predict_records(records)
+            engine.predict_records(records)
+            load.assert_called_once()
+        self.assertEqual(large[:COMPILED_MAX_ROWS], small)
+
+
+class InferenceServerTests(TrainedModelTestCase):
+    def test_only_run_directories_are_served(self):
+        from .inference_server import InferenceServer
+        from .ipc import RemoteError, predict_remote
+        socket_path = os.path.join(self.media_root, 'inference.sock')
+        server = InferenceServer(socket_path)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            result, version, features = predict_remote(socket_path, self.training_run.artifacts_dir, self.records[0])
+            self.assertIn('risco_churn', result)
+            self.assertIn('Perfil_Risco', features)
+            for artifacts_dir in (self.media_root, os.path.join(self.training_run.artifacts_dir, '..', '..')):
+                with self.assertRaises(RemoteError):
+                    predict_remote(socket_path, artifacts_dir, self.records[0])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_unreachable_server_falls_back_to_in_process_scoring(self):
+        from . import services
+        socket_path = os.path.join(self.media_root, 'missing.sock')
+        with self.settings(PREDICTOR_INFERENCE_SOCKET=socket_path, PREDICTOR_CACHE_SIZE=0), \
+                self.assertLogs('predictor.services', 'WARNING'):
+            result, version = services.predict(self.records[0], self.training_run)
+        bundle = services.get_bundle(self.training_run.artifacts_dir)
+        self.assertEqual(result, services.predict_single(self.records[0], bundle))
+        self.assertEqual(version, bundle.version)
+
+    def test_holder_keeps_alternating_runs_resident(self):
+        from .model_cache import ModelHolder
+        alias = os.path.join(self.media_root, 'runs', 'alias')
+        os.symlink(self.training_run.artifacts_dir, alias)
+        try:
+            holder = ModelHolder()
+            for _ in range(3):
+                holder.get(self.training_run.artifacts_dir)
+                holder.get(alias)
+            self.assertEqual(holder.loads, 2)
+            self.assertEqual(len(holder.stats()['resident']), 2)
+        finally:
+            os.remove(alias)
+
+
+class SnapshotViewTests(TrainedModelTestCase):
+    def test_unchanged_snapshot_answers_304(self):
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.training_run.snapshot.metrics)
+        etag = response['ETag']
+        cached = self.client.get('/api/metrics/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        self.assertEqual(cached['ETag'], etag)
+        self.assertNotEqual(self.client.get('/api/stats/')['ETag'], etag)
+
+    def test_backfill_moves_payload_sections_into_a_snapshot(self):
+        from importlib import import_module
+        from django.apps import apps
+        from .models import MetricsSnapshot, TrainingRun
+        sections = {'metrics': {'total': 1}, 'performance': {'acuracia': 0.9}, 'stats': {'clientes': 2}}
+        run = TrainingRun.objects.create(status='committed', dataset_url='http://example.com/clientes.csv',
+                                         artifacts_dir='runs/old', payload={**sections, 'charts': {}})
+        partial_run = TrainingRun.objects.create(status='committed', dataset_url='http://example.com/clientes.csv',
+                                                 artifacts_dir='runs/partial', payload={'metrics': {}})
+        import_module('predictor.migrations.0005_backfill_metricssnapshot').backfill_snapshots(apps, None)
+        run.refresh_from_db()
+        snapshot = MetricsSnapshot.objects.get(run=run)
+        self.assertEqual({section: getattr(snapshot, section) for section in sections}, sections)
+        self.assertEqual(run.payload, {'charts': {}})
+        self.assertFalse(MetricsSnapshot.objects.filter(run=partial_run).exists())
+
+
+class RetrainingTests(TrainedModelTestCase):
+    def test_unchanged_dataset_keeps_the_latest_run(self):
+        run = self.train()
+        self.assertEqual((run.status, run.motivo_refit), ('unchanged', 'no_new_rows'))
+        self.assertEqual(get_latest_run(), self.training_run)
+
+    def test_small_delta_grows_no_trees(self):
+        df = pd.read_csv(os.path.join(self.media_root, 'clientes.csv'))
+        extra = generate_clients(4, seed=3, missing_rate=0)
+        extra['Id'] += len(df)
+        pd.concat([df, extra], ignore_index=True).to_csv(os.path.join(self.media_root, 'appended.csv'), index=False)
+        run = self.train('appended.csv')
+        self.assertEqual((run.status, run.modo_treino), ('committed', 'incremental'))
+        self.assertEqual(run.payload['training']['n_new_trees'], 0)
+        self.assertEqual(len(joblib.load(os.path.join(run.artifacts_dir, 'rf_holding.pkl')).estimators_), 10)
+
+
+class TrainingJobViewTests(TrainedModelTestCase):
+    def test_requires_staff(self):
+        self.assertEqual(self.client.post('/api/predict/train/').status_code, 401)
+        user = make_user('cliente@example.com')
+        self.assertEqual(self.client.post('/api/predict/train/', **bearer(user)).status_code, 403)
+
+    @mock.patch('predictor.jobs._executor')
+    def test_trains_on_the_configured_dataset(self, executor):
+        staff = make_user('staff@example.com', is_staff=True)
+        response = self.client.post('/api/predict/train/', {'url': 'http://169.254.169.254/'},
+                                    content_type='application/json', **bearer(staff))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['dataset_url'], settings.PREDICTOR_DATASET_URL)
+        self.assertEqual([stage['status'] for stage in response.json()['stages']], ['pending'] * len(TRAINING_STAGES))
+        executor.submit.assert_called_once()
+
+    def test_reports_each_stage_in_order(self):
+        from .v2churn_predictor import run_predictor
+        stages = []
+        with self.serving() as url:
+            run_predictor(url, os.path.join(self.media_root, 'stages'), on_stage=stages.append,
+                          params=self.forest_params)
+        self.assertEqual(stages, TRAINING_STAGES)
+
+
+class InlineOffload:
+    """Runs offloaded calls on the test thread, so they see the test's transaction."""
+
+    async def run(self, fn, *args, **kwargs):
+        return await sync_to_async(fn)(*args, **kwargs)
+
+
+@mock.patch('predictor.async_views.close_old_connections', mock.Mock())
+@mock.patch('predictor.services.get_offload', InlineOffload)
+class AsyncTrainViewTests(TestCase):
+    url = '/api/async/predict/train/'
+
+    def test_requires_staff(self):
+        self.assertEqual(self.client.post(self.url).status_code, 401)
+        user = make_user('cliente@example.com')
+        self.assertEqual(self.client.post(self.url, **bearer(user)).status_code, 403)
+
+    @mock.patch('predictor.jobs._executor')
+    def test_trains_on_the_configured_dataset(self, executor):
+        staff = make_user('staff@example.com', is_staff=True)
+        response = self.client.post(self.url, {'url': 'http://169.254.169.254/'},
+                                    content_type='application/json', **bearer(staff))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['dataset_url'], settings.PREDICTOR_DATASET_URL)
+        executor.submit.assert_called_once()
+
+    def test_saturated_pool_answers_503(self):
+        offload = mock.Mock(run=mock.AsyncMock(side_effect=Saturated('full')))
+        with mock.patch('predictor.services.get_offload', return_value=offload):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+class ClientScoreTests(TrainedModelTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.staff = make_user('staff@example.com', is_staff=True)
+        cls.users = [
+            make_user(f"cliente{i}@example.com", data_nascimento=f"19{60 + 7 * i}-05-10", patrimonio=50_000 * i,
+                      conhecimento_investimento=conhecimento)
+            for i, conhecimento in enumerate(['beginner', 'intermediate', 'advanced'])
+        ]
+
+    def set_scores(self, *scores):
+        from .models import ClientScore
+        for user, (prob_churn, risco_churn) in zip(self.users, scores):
+            ClientScore.objects.create(user=user, run=self.training_run, prob_holding=50.0, prob_churn=prob_churn,
+                                       abriu_holding=False, risco_churn=risco_churn, atualizado_em=timezone.now())
+
+    def list_users(self, **params):
+        response = self.client.get('/api/users/', params, **bearer(self.staff))
+        self.assertEqual(response.status_code, 200)
+        return [user['email'] for user in response.json()]
+
+    def test_score_all_matches_predict_single(self):
+        from .models import ClientScore
+        from .scoring import score_users, user_features, user_rows
+        from .services import get_bundle, predict_single
+        bundle = get_bundle(self.training_run.artifacts_dir)
+        self.assertEqual(score_users(self.training_run, bundle, chunk_size=2), 4)
+        neutral_score = dict(zip(bundle.scaler.feature_names_in_, bundle.scaler.mean_))['Score_Relacionamento']
+        for row in user_rows():
+            expected = predict_single(user_features(row, timezone.localdate(), neutral_score), bundle)
+            score = ClientScore.objects.get(user_id=row[0])
+            self.assertAlmostEqual(score.prob_churn, expected['probabilidades']['churn_medio'])
+            self.assertAlmostEqual(score.prob_holding, expected['probabilidades']['holding_sim'])
+            self.assertEqual(score.risco_churn, expected['risco_churn'])
+            self.assertEqual(score.abriu_holding, expected['abriu_holding'] == 'Sim')
+
+    def test_risk_filters_and_ordering(self):
+        self.set_scores((10.0, 'Baixo'), (80.0, 'Médio'), (60.0, 'Médio'))
+        emails = [user.email for user in self.users]
+        self.assertEqual(self.list_users(risco='baixo'), emails[:1])
+        self.assertEqual(sorted(self.list_users(risco='medio')), sorted(emails[1:]))
+        self.assertEqual(sorted(self.list_users(churn_min='50')), sorted(emails[1:]))
+        self.assertEqual(self.list_users(ordering='-prob_churn'), [emails[1], emails[2], emails[0], self.staff.email])
+        self.assertEqual(self.list_users(ordering='prob_churn'), [emails[0], emails[2], emails[1], self.staff.email])
+
+    def test_score_is_only_listed(self):
+        self.set_scores((10.0, 'Baixo'))
+        with self.assertNumQueries(2):
+            users = self.client.get('/api/users/', **bearer(self.staff)).json()
+        scored = {user['email'] for user in users if user['score'] is not None}
+        self.assertEqual(scored, {self.users[0].email})
+        detail = self.client.get(f"/api/users/{self.users[0].id}/", **bearer(self.staff)).json()
+        self.assertNotIn('score', detail)
@@ -0,0 +1,110 @@
+import time
+import pstats
+import cProfile
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+
+
+_tracer = contextvars.ContextVar('predictor_tracer', default=None)
+_parent = contextvars.ContextVar('predictor_span', default=None)
+
+
+class Tracer:
+    """Collects timed spans of a training run, and optionally a cProfile of every traced thread.
+
+    Spans are plain dicts (id, parent, name, thread, started_at, duration_s, attrs and, when the
+    block raised, error) so they can be stored as JSON on the run.
+    """
+
+    def __init__(self, profile=False):
+        self.spans = []
+        self.profile = profile
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """Make this the tracer that span() records into, in the current context."""
+        token = _tracer.set(self)
+        try:
+            yield self
+        finally:
+            _tracer.reset(token)
+
+    @contextmanager
+    def profiled(self):
+        """Profile the current thread for the duration of the block when profiling is enabled."""
+        if not self.profile:
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._profiles.append(profile)
+
+    def dump_profile(self, path):
+        """Write the merged profiles of every traced thread as a pstats file."""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+        return path
+
+    def durations(self, *names):
+        """Duration of the last span with each name, e.g. for a timings summary."""
+        found = {span['name']: span['duration_s'] for span in self.spans if span['name'] in names}
+        return {name: found[name] for name in names if name in found}
+
+
+def current_tracer():
+    return _tracer.get()
+
+
+@contextmanager
+def span(name, **attrs):
+    """Record the block as a span of the active tracer; a no-op when no tracer is active."""
+    tracer = _tracer.get()
+    if tracer is None:
+        yield
+        return
+    record = {
+        'name': name,
+        'parent': _parent.get(),
+        'thread': threading.current_thread().name,
+        'started_at': round(time.time(), 3),
+    }
+    if attrs:
+        record['attrs'] = attrs
+    with tracer._lock:
+        record['id'] = len(tracer.spans)
+        tracer.spans.append(record)
+    token = _parent.set(record['id'])
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        record['error'] = type(e).__name__
+        raise
+    finally:
+        record['duration_s'] = round(time.perf_counter() - start, 6)
+        _parent.reset(token)
+
+
+def in_context(fn):
+    """Bind fn to the caller's tracer and current span, for running it in another thread."""
+    context = contextvars.copy_context()
+    tracer = _tracer.get()
+
+    def run(*args, **kwargs):
+        with tracer.profiled() if tracer is not None else nullcontext():
+            return context.run(fn, *args, **kwargs)
+    return run
@@ -0,0 +1,77 @@
+import re
+from datetime import timedelta
+from .models import RunAggregate
+
+DEFAULT_WINDOW = '7d'
+WINDOW_UNITS = {'h': 'hours', 'd': 'days', 'w': 'weeks'}
+# Longer windows would not fit in a timedelta, or reach before datetime.min once subtracted.
+MAX_WINDOW = timedelta(days=3650)
+
+# Trend name -> RunAggregate field, matching the keys of metrics.trends.
+TREND_FIELDS = {
+    'predictions': 'total_previsoes',
+    'conversions': 'conversoes_holding',
+    'risk': 'clientes_risco_medio',
+    'accuracy': 'acuracia',
+}
+
+
+def parse_window(value):
+    """Parse windows such as '24h', '7d' or '4w' into a timedelta."""
+    match = re.fullmatch(r'(\d+)([hdw])', value.strip())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid window {value!r}; use e.g. 24h, 7d or 4w")
+    try:
+        window = timedelta(**{WINDOW_UNITS[match.group(2)]: int(match.group(1))})
+    except OverflowError:
+        window = None
+    if window is None or window > MAX_WINDOW:
+        raise ValueError(f"Invalid window {value!r}; windows are limited to {MAX_WINDOW.days} days")
+    return window
+
+
+def record_aggregate(run, metrics):
+    """Append the run's aggregates to the time series."""
+    return RunAggregate.objects.create(
+        run=run,
+        total_previsoes=metrics['totalPredictions'],
+        conversoes_holding=metrics['holdingConversions'],
+        clientes_risco_medio=metrics['highRiskClients'],
+        acuracia=metrics['modelAccuracy'],
+    )
+
+
+def percent_change(current, baseline):
+    if not baseline:
+        return 0.0
+    return (current - baseline) / baseline * 100
+
+
+def compute_trends(window, latest=None):
+    """Percent change of each aggregate between ``latest`` and the series ``window`` earlier.
+
+    The baseline is the last point recorded at or before ``latest.criado_em - window``; when
+    the series is shorter than the window, the oldest point is used instead. Both lookups are
+    range queries on the criado_em index. Returns None when there is no data.
+    """
+    points = RunAggregate.objects.all()
+    latest = latest or points.order_by('-criado_em').first()
+    if latest is None:
+        return None
+    cutoff = latest.criado_em - window
+    baseline = (
+        points.filter(criado_em__lte=cutoff).order_by('-criado_em').first()
+        or points.filter(criado_em__lt=latest.criado_em).order_by('criado_em').first()
+    )
+    deltas = {
+        name: percent_change(getattr(latest, field), getattr(baseline, field)) if baseline else 0.0
+        for name, field in TREND_FIELDS.items()
+    }
+    return {
+        'to': latest.criado_em,
+        'from': baseline.criado_em if baseline else None,
+        'partial': baseline is None or baseline.criado_em > cutoff,
+        'current': {name: getattr(latest, field) for name, field in TREND_FIELDS.items()},
+        'baseline': {name: getattr(baseline, field) for name, field in TREND_FIELDS.items()} if baseline else None,
+        'deltas': deltas,
+    }
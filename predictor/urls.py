@@ -1,9 +1,33 @@
 from django.urls import path
-from .views import PredictorView, MetricsView, PerformanceView, StatsView
+from . import async_views
+from .views import (
+    PredictorView,
+    BatchPredictorView,
+    ModelStatusView,
+    TrainingJobView,
+    TrainingJobDetailView,
+    ChartView,
+    ChartDataView,
+    MetricsView,
+    TrendsView,
+    PerformanceView,
+    StatsView
+)
 
 urlpatterns = [
     path('predict/', PredictorView.as_view(), name='predict'),
+    path('predict/batch/', BatchPredictorView.as_view(), name='predict-batch'),
+    path('predict/model/', ModelStatusView.as_view(), name='predict-model'),
+    path('predict/train/', TrainingJobView.as_view(), name='predict-train'),
+    path('predict/train/<str:id>/', TrainingJobDetailView.as_view(), name='predict-train-detail'),
+    path('predict/charts/', ChartDataView.as_view(), name='predict-charts'),
+    path('predict/charts/<str:id>/<str:name>/', ChartView.as_view(), name='predict-chart'),
     path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('metrics/trends/', TrendsView.as_view(), name='metrics-trends'),
     path('model-performance/', PerformanceView.as_view(), name='model-performance'),
     path('stats/', StatsView.as_view(), name='stats'),
+    path('async/predict/', async_views.predict, name='async-predict'),
+    path('async/predict/batch/', async_views.predict_batch, name='async-predict-batch'),
+    path('async/predict/model/', async_views.model_status, name='async-predict-model'),
+    path('async/predict/train/', async_views.train, name='async-predict-train'),
 ]
\ No newline at end of file
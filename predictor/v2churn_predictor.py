@@ -4,29 +4,35 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.model_selection import cross_val_score
+from sklearn.metrics import classification_report, confusion_matrix, get_scorer
+from sklearn.model_selection import cross_validate
 import joblib
+from joblib import parallel_config
 import os
-import requests
 import cloudinary
 import cloudinary.uploader
-from io import StringIO
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from .model_cache import model_holder
+from .dataset_cache import fetch_dataset, read_dataset
+from .artifacts import FOREST_FILE
+from .forest import compile_forest, save_compiled_forests, load_compiled_forests
+from .incremental import HOLDOUT_FILE, TARGETS, DatasetUnchanged, row_hashes, fingerprint_rows, plan_training
+from .ingest import stream_dataset, preprocess_streamed
+from .tracing import Tracer, current_tracer, in_context, span
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def download_csv_from_cloudinary(url):
-    """Download CSV file from Cloudinary."""
+def download_csv_from_cloudinary(url, cache_dir=None, read=True):
+    """Download CSV file from Cloudinary through the local dataset cache.
+
+    Returns the DataFrame, or the local path of the CSV when ``read`` is False.
+    """
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return pd.read_csv(StringIO(response.text))
+        path = fetch_dataset(url, cache_dir)
+        return read_dataset(path) if read else path
     except Exception as e:
         logger.error(f"Failed to download CSV from Cloudinary: {str(e)}")
         raise Exception(f"Failed to download CSV from Cloudinary: {str(e)}")
@@ -44,11 +50,58 @@ def upload_image_to_cloudinary(image_path):
         logger.error(f"Failed to upload image to Cloudinary: {str(e)}")
         raise Exception(f"Failed to upload image to Cloudinary: {str(e)}")
 
-def load_and_preprocess_data(cloudinary_url, output_dir='media'):
-    """Load and preprocess the CSV file from Cloudinary."""
+def dataset_fingerprint(df):
+    """Return a SHA-256 fingerprint of the raw dataset contents."""
+    return fingerprint_rows(row_hashes(df))
+
+def load_and_preprocess_data(cloudinary_url, output_dir='media', on_stage=None, cache_dir=None,
+                             previous=None, full_refit_reason=None, chunked_ingest_mb=None):
+    """Load and preprocess the CSV file from Cloudinary into features X and targets y.
+
+    Also plans the training (see plan_training); incremental runs keep the previous encoder and
+    scaler, since the existing trees were grown on features encoded and scaled by them.
+    CSVs of at least ``chunked_ingest_mb`` MB are streamed instead of loaded (see ingest.py).
+    """
     logger.debug("Loading and preprocessing data")
-    df = download_csv_from_cloudinary(cloudinary_url)
-    
+    on_stage = on_stage or (lambda stage: None)
+    on_stage('download')
+    with span('download'):
+        csv_path = download_csv_from_cloudinary(cloudinary_url, cache_dir, read=False)
+    os.makedirs(output_dir, exist_ok=True)
+    if chunked_ingest_mb is not None and os.path.getsize(csv_path) >= chunked_ingest_mb * 1024 ** 2:
+        X, y, le, scaler, fingerprint, plan = _load_streamed(csv_path, output_dir, on_stage, previous, full_refit_reason)
+    else:
+        X, y, le, scaler, fingerprint, plan = _load_in_memory(csv_path, on_stage, previous, full_refit_reason)
+
+    joblib.dump(le, os.path.join(output_dir, 'label_encoder.pkl'))
+    joblib.dump(scaler, os.path.join(output_dir, 'standard_scaler.pkl'))
+
+    return X, y, le, scaler, fingerprint, plan
+
+def _previous_preprocessors(plan):
+    """The encoder and scaler of the run an incremental plan grows on."""
+    return (joblib.load(os.path.join(plan['previous_dir'], 'label_encoder.pkl')),
+            joblib.load(os.path.join(plan['previous_dir'], 'standard_scaler.pkl')))
+
+def _load_in_memory(csv_path, on_stage, previous, full_refit_reason):
+    """Preprocess the whole dataset as one DataFrame, read through its Feather snapshot."""
+    with span('read', streamed=False):
+        df = read_dataset(csv_path)
+    with span('fingerprint'):
+        hashes = row_hashes(df)
+        fingerprint = fingerprint_rows(hashes)
+    with span('plan'):
+        plan = plan_training(df, hashes, previous, full_refit_reason)
+    logger.debug(f"Training plan: {plan['mode']} {plan['reason']}")
+    if plan['mode'] == 'unchanged':
+        raise DatasetUnchanged()
+    on_stage('preprocess')
+    with span('preprocess'):
+        X, y, le, scaler = _preprocess_frame(df, plan)
+    return X, y, le, scaler, fingerprint, plan
+
+def _preprocess_frame(df, plan):
+    """Impute, encode and scale the dataset in memory; returns (X, y, le, scaler)."""
     logger.debug(f"Risco_Churn values: {df['Risco_Churn'].value_counts().to_dict()}")
     
     colunas_numericas = ['Idade', 'Volume_Investimentos', 'Qtd_Servicos_Contratados', 'Score_Relacionamento']
@@ -56,186 +109,337 @@ def load_and_preprocess_data(cloudinary_url, output_dir='media'):
         df[col] = df[col].fillna(df[col].median())
     df['Perfil_Risco'] = df['Perfil_Risco'].fillna(df['Perfil_Risco'].mode()[0])
     
-    le = LabelEncoder()
-    df['Perfil_Risco'] = le.fit_transform(df['Perfil_Risco'])
-    
-    scaler = StandardScaler()
-    df[colunas_numericas] = scaler.fit_transform(df[colunas_numericas])
-    
-    os.makedirs(output_dir, exist_ok=True)
-    joblib.dump(le, os.path.join(output_dir, 'label_encoder.pkl'))
-    joblib.dump(scaler, os.path.join(output_dir, 'standard_scaler.pkl'))
+    if plan['mode'] == 'incremental':
+        le, scaler = _previous_preprocessors(plan)
+        df['Perfil_Risco'] = le.transform(df['Perfil_Risco'])
+        df[colunas_numericas] = scaler.transform(df[colunas_numericas])
+    else:
+        le = LabelEncoder()
+        df['Perfil_Risco'] = le.fit_transform(df['Perfil_Risco'])
+
+        scaler = StandardScaler()
+        df[colunas_numericas] = scaler.fit_transform(df[colunas_numericas])
     
-    return df, le, scaler
+    X = df.drop(['Abriu_Holding', 'Risco_Churn', 'Id'], axis=1)
+    return X, df[list(TARGETS)], le, scaler
+
+def run_features(df, artifacts_dir):
+    """Preprocess a run's dataset with the encoder and scaler saved in its artifacts_dir."""
+    return _preprocess_frame(df, {'mode': 'incremental', 'previous_dir': artifacts_dir})[:2]
+
+def _load_streamed(csv_path, output_dir, on_stage, previous, full_refit_reason):
+    """Stream the dataset in chunks into a memory-mapped float32 feature matrix."""
+    with span('read', streamed=True):
+        dataset = stream_dataset(csv_path, output_dir)
+    try:
+        with span('fingerprint'):
+            fingerprint = fingerprint_rows(dataset.hashes)
+        with span('plan'):
+            plan = plan_training(dataset.labels, dataset.hashes, previous, full_refit_reason)
+        logger.debug(f"Training plan: {plan['mode']} {plan['reason']} (streamed)")
+        if plan['mode'] == 'unchanged':
+            raise DatasetUnchanged()
+        on_stage('preprocess')
+        logger.debug(f"Risco_Churn values: {dataset.labels['Risco_Churn'].value_counts().to_dict()}")
+
+        with span('preprocess'):
+            le, scaler = _previous_preprocessors(plan) if plan['mode'] == 'incremental' else (None, None)
+            le, scaler = preprocess_streamed(dataset, le, scaler)
+    finally:
+        # The mappings outlive the files, so nothing is left behind in the run directory.
+        dataset.unlink()
+    return dataset.features_frame(), dataset.labels[list(TARGETS)], le, scaler, fingerprint, plan
+
+def holdout_folds(n_samples, test_size=0.2, n_splits=5, random_state=42):
+    """K-fold splits over one shuffled permutation whose first fold is the train_test_split holdout.
+
+    ``train_test_split(test_size=0.2, random_state=42)`` takes the first 20% of the same
+    permutation as its test set, so the model fitted on fold 0 is the holdout model and
+    cross-validation does not need a separate fit.
+    """
+    permutation = np.random.RandomState(random_state).permutation(n_samples)
+    n_test = int(np.ceil(test_size * n_samples))
+    for k in range(n_splits):
+        stop = (k + 1) * n_test if k < n_splits - 1 else n_samples
+        test = permutation[k * n_test:stop]
+        train = np.concatenate([permutation[:k * n_test], permutation[stop:]])
+        yield train, test
+
+def warm_start_and_evaluate(X, y, scoring, rf, train, test, n_new_trees, n_jobs=-1):
+    """Grow n_new_trees on the appended rows and evaluate on rows no tree was trained on."""
+    if n_new_trees:
+        rf.set_params(warm_start=True, n_estimators=rf.n_estimators + n_new_trees, n_jobs=n_jobs)
+        with span('warm_start', target=y.name, rows=len(train), n_new_trees=n_new_trees):
+            with parallel_config(backend='threading', n_jobs=n_jobs):
+                rf.fit(X.iloc[train], y.iloc[train])
+    # Single-threaded from here on, see train_and_evaluate.
+    rf.set_params(warm_start=False, n_jobs=1)
+    with span('holdout_eval', target=y.name, rows=len(test)):
+        X_test, y_test = X.iloc[test], y.iloc[test]
+        y_pred = rf.predict(X_test)
+        y_prob = rf.predict_proba(X_test)
+        score = get_scorer(scoring)(rf, X_test, y_test)
+    return rf, score, y_test, y_pred, y_prob
+
+def _warm_start(plan, filename):
+    """Arguments for warm_start_and_evaluate from an incremental training plan, or None."""
+    if plan is None or plan['mode'] != 'incremental':
+        return None
+    return {
+        'rf': joblib.load(os.path.join(plan['previous_dir'], filename)),
+        'train': plan['train'],
+        'test': plan['test'],
+        'n_new_trees': plan['n_new_trees'],
+    }
 
-def train_and_evaluate_holding(df, output_dir='media'):
+def train_and_evaluate(X, y, scoring, n_jobs=-1, warm_start=None, params=None):
+    """Cross-validate a Random Forest and evaluate the holdout model reused from fold 0.
+
+    ``params`` are RandomForestClassifier hyperparameters (see search.py); defaults otherwise.
+    With ``warm_start`` the previous forest is grown instead; the score is then the holdout
+    score of the grown forest rather than a cross-validation mean.
+    """
+    if warm_start is not None:
+        return warm_start_and_evaluate(X, y, scoring, n_jobs=n_jobs, **warm_start)
+    folds = list(holdout_folds(len(X)))
+    # Threads: forest fitting releases the GIL, and both targets train concurrently.
+    with span('cross_validate', target=y.name, scoring=scoring, folds=len(folds)):
+        with parallel_config(backend='threading', n_jobs=n_jobs):
+            cv = cross_validate(
+                RandomForestClassifier(random_state=42, n_jobs=n_jobs, **(params or {})), X, y,
+                cv=folds, scoring=scoring, return_estimator=True, n_jobs=n_jobs
+            )
+    rf = cv['estimator'][0]
+    # With n_jobs > 1 predict_proba sums the trees in whatever order the threads finish, which is
+    # not reproducible bit for bit; the saved forest predicts tree by tree like CompiledForest.
+    rf.set_params(n_jobs=1)
+    train, test = folds[0]
+    with span('holdout_eval', target=y.name, rows=len(test)):
+        X_test, y_test = X.iloc[test], y.iloc[test]
+        y_pred = rf.predict(X_test)
+        y_prob = rf.predict_proba(X_test)
+    return rf, cv['test_score'].mean(), y_test, y_pred, y_prob
+
+def train_and_evaluate_holding(X, y_holding, output_dir='media', n_jobs=-1, plan=None, params=None):
     """Train and evaluate Random Forest for 'Abriu_Holding'."""
     logger.debug("Training and evaluating holding model")
-    X = df.drop(['Abriu_Holding', 'Risco_Churn', 'Id'], axis=1)
-    y_holding = df['Abriu_Holding']
-    
-    X_train_h, X_test_h, y_train_h, y_test_h = train_test_split(X, y_holding, test_size=0.2, random_state=42)
-    
-    rf_h = RandomForestClassifier(random_state=42)
-    rf_h.fit(X_train_h, y_train_h)
-    y_pred_h = rf_h.predict(X_test_h)
-    y_prob_h = rf_h.predict_proba(X_test_h)
+    rf_h, f1_h, y_test_h, y_pred_h, y_prob_h = train_and_evaluate(
+        X, y_holding, 'f1', n_jobs, warm_start=_warm_start(plan, 'rf_holding.pkl'), params=params
+    )
     
     report_h = classification_report(y_test_h, y_pred_h, output_dict=True, labels=[0, 1])
-    matrix_h = confusion_matrix(y_test_h, y_pred_h).tolist()
+    matrix_h = confusion_matrix(y_test_h, y_pred_h, labels=[0, 1])
     
     report_path = os.path.join(output_dir, 'relatorio_holding.txt')
     with open(report_path, 'w') as f:
         f.write(classification_report(y_test_h, y_pred_h))
     
-    matriz_holding_path = os.path.join(output_dir, 'matriz_holding.png')
-    plt.figure(figsize=(6, 5))
-    sns.heatmap(confusion_matrix(y_test_h, y_pred_h), annot=True, fmt='d')
-    plt.title('Matriz - Abriu Holding')
-    plt.savefig(matriz_holding_path)
-    plt.close()
-    matriz_holding_url = upload_image_to_cloudinary(matriz_holding_path)
-    
-    importancia_holding_path = os.path.join(output_dir, 'importancia_holding.png')
     importances_h = pd.Series(rf_h.feature_importances_, index=X.columns)
-    plt.figure(figsize=(8, 6))
-    importances_h.sort_values(ascending=False).plot(kind='barh')
-    plt.title('Importância das Variáveis - Holding')
-    plt.savefig(importancia_holding_path, bbox_inches="tight")
-    plt.close()
-    importancia_holding_url = upload_image_to_cloudinary(importancia_holding_path)
-    
-    scores_h = cross_val_score(rf_h, X, y_holding, cv=5, scoring='f1')
     
     joblib.dump(rf_h, os.path.join(output_dir, 'rf_holding.pkl'))
     
-    return report_h, scores_h.mean(), matriz_holding_url, importancia_holding_url, report_path, importances_h.to_dict(), y_prob_h
+    return report_h, f1_h, matrix_h, report_path, importances_h.to_dict(), y_prob_h
 
-def train_and_evaluate_churn(df, output_dir='media'):
+def train_and_evaluate_churn(X, y_churn, output_dir='media', n_jobs=-1, plan=None, params=None):
     """Train and evaluate Random Forest for 'Risco_Churn'."""
     logger.debug("Training and evaluating churn model")
-    X = df.drop(['Abriu_Holding', 'Risco_Churn', 'Id'], axis=1)
-    y_churn = df['Risco_Churn']
-    
-    X_train_c, X_test_c, y_train_c, y_test_c = train_test_split(X, y_churn, test_size=0.2, random_state=42)
-    
-    rf_c = RandomForestClassifier(random_state=42)
-    rf_c.fit(X_train_c, y_train_c)
-    y_pred_c = rf_c.predict(X_test_c)
-    y_prob_c = rf_c.predict_proba(X_test_c)
+    rf_c, f1_c, y_test_c, y_pred_c, y_prob_c = train_and_evaluate(
+        X, y_churn, 'f1_weighted', n_jobs, warm_start=_warm_start(plan, 'rf_churn.pkl'), params=params
+    )
     
     # Explicitly define labels for binary classification (0=Baixo, 1=Médio)
     report_c = classification_report(y_test_c, y_pred_c, output_dict=True, labels=[0, 1])
-    matrix_c = confusion_matrix(y_test_c, y_pred_c, labels=[0, 1]).tolist()
-    
-    matriz_churn_path = os.path.join(output_dir, 'matriz_churn.png')
-    plt.figure(figsize=(6, 5))
-    sns.heatmap(confusion_matrix(y_test_c, y_pred_c, labels=[0, 1]), annot=True, fmt='d')
-    plt.title('Matriz - Risco de Churn')
-    plt.savefig(matriz_churn_path)
-    plt.close()
-    matriz_churn_url = upload_image_to_cloudinary(matriz_churn_path)
+    matrix_c = confusion_matrix(y_test_c, y_pred_c, labels=[0, 1])
     
-    importancia_churn_path = os.path.join(output_dir, 'importancia_churn.png')
     importances_c = pd.Series(rf_c.feature_importances_, index=X.columns)
-    plt.figure(figsize=(8, 6))
-    importances_c.sort_values(ascending=False).plot(kind='barh')
-    plt.title('Importância das Variáveis - Churn')
-    plt.savefig(importancia_churn_path, bbox_inches="tight")
-    plt.close()
-    importancia_churn_url = upload_image_to_cloudinary(importancia_churn_path)
-    
-    scores_c = cross_val_score(rf_c, X, y_churn, cv=5, scoring='f1_weighted')
     
     joblib.dump(rf_c, os.path.join(output_dir, 'rf_churn.pkl'))
     
-    return report_c, scores_c.mean(), matriz_churn_url, importancia_churn_url, importances_c.to_dict(), y_prob_c
+    return report_c, f1_c, matrix_c, importances_c.to_dict(), y_prob_c
+
+def _traced(name, fn, *args):
+    """Call fn(*args) inside a span called name."""
+    with span(name):
+        return fn(*args)
 
-def predict_single(data, output_dir='media'):
-    """Predict for a single data point using saved models."""
+def plot_confusion_matrix(matrix, title, path):
+    """Render a confusion matrix heatmap to a PNG file."""
+    plt.figure(figsize=(6, 5))
+    sns.heatmap(matrix, annot=True, fmt='d')
+    plt.title(title)
+    plt.savefig(path)
+    plt.close()
+    return path
+
+def plot_importances(importances, title, path):
+    """Render a horizontal bar chart of feature importances to a PNG file."""
+    plt.figure(figsize=(8, 6))
+    pd.Series(importances).sort_values(ascending=False).plot(kind='barh')
+    plt.title(title)
+    plt.savefig(path, bbox_inches="tight")
+    plt.close()
+    return path
+
+def chart_data(matrix_h, importances_h, matrix_c, importances_c):
+    """Data behind the four training charts, rendered on demand or drawn client-side."""
+    return {
+        'matriz_holding': {'type': 'confusion_matrix', 'title': 'Matriz - Abriu Holding', 'matrix': matrix_h.tolist()},
+        'importancia_holding': {'type': 'feature_importance', 'title': 'Importância das Variáveis - Holding', 'importances': importances_h},
+        'matriz_churn': {'type': 'confusion_matrix', 'title': 'Matriz - Risco de Churn', 'matrix': matrix_c.tolist()},
+        'importancia_churn': {'type': 'feature_importance', 'title': 'Importância das Variáveis - Churn', 'importances': importances_c},
+    }
+
+def render_chart(chart, path):
+    """Render one chart produced by chart_data to a PNG file."""
+    if chart['type'] == 'confusion_matrix':
+        return plot_confusion_matrix(np.array(chart['matrix']), chart['title'], path)
+    return plot_importances(chart['importances'], chart['title'], path)
+
+def export_compiled_forests(rf_h, rf_c, output_dir='media'):
+    """Export both forests as flat node tables stored in a single .npz."""
+    logger.debug("Exporting compiled forests")
+    path = os.path.join(output_dir, FOREST_FILE)
+    save_compiled_forests({'holding': compile_forest(rf_h), 'churn': compile_forest(rf_c)}, path)
+    return path
+
+def verify_compiled_forests(X, rf_h, rf_c, output_dir='media', block_rows=100_000):
+    """Check the exported forests reproduce predict_proba bit-for-bit on the training data."""
+    logger.debug("Verifying compiled forests")
+    forests = load_compiled_forests(os.path.join(output_dir, FOREST_FILE))
+    # Block by block, so a memory-mapped X is never converted to float64 whole.
+    for start in range(0, len(X), block_rows):
+        block = X.iloc[start:start + block_rows]
+        for name, rf in (('holding', rf_h), ('churn', rf_c)):
+            if not np.array_equal(rf.predict_proba(block), forests[name].predict_proba(block.to_numpy(dtype=np.float64))):
+                raise Exception(f"Compiled {name} forest does not match predict_proba")
+
+def predict_single(data, output_dir='media', bundle=None):
+    """Predict for a single data point using the bundle's pure-NumPy inference engine."""
     logger.debug("Predicting single data point")
     try:
-        le = joblib.load(os.path.join(output_dir, 'label_encoder.pkl'))
-        scaler = joblib.load(os.path.join(output_dir, 'standard_scaler.pkl'))
-        rf_h = joblib.load(os.path.join(output_dir, 'rf_holding.pkl'))
-        rf_c = joblib.load(os.path.join(output_dir, 'rf_churn.pkl'))
-        
-        input_data = pd.DataFrame([data])
-        input_data['Perfil_Risco'] = le.transform([input_data['Perfil_Risco'].iloc[0]])[0]
-        
-        colunas_numericas = ['Idade', 'Volume_Investimentos', 'Qtd_Servicos_Contratados', 'Score_Relacionamento']
-        input_data[colunas_numericas] = scaler.transform(input_data[colunas_numericas])
-        
-        pred_h = rf_h.predict(input_data)[0]
-        prob_h = rf_h.predict_proba(input_data)[0]
-        pred_c = rf_c.predict(input_data)[0]
-        prob_c = rf_c.predict_proba(input_data)[0]
-        
-        importances_h = joblib.load(os.path.join(output_dir, 'importances_holding.pkl'))
-        feature_importance = [{'feature': k, 'importance': v} for k, v in importances_h.items()]
-        
-        return {
-            'abriu_holding': 'Sim' if pred_h == 1 else 'Não',
-            'risco_churn': {0: 'Baixo', 1: 'Médio'}[pred_c],
-            'probabilidades': {
-                'holding_sim': prob_h[1] * 100,
-                'holding_nao': prob_h[0] * 100,
-                'churn_medio': prob_c[1] * 100,
-                'churn_baixo': prob_c[0] * 100,
-            },
-            'feature_importance': feature_importance
-        }
+        if bundle is None:
+            bundle = model_holder.get(output_dir)
+        return bundle.engine.predict_one(data)
     except Exception as e:
         logger.error(f"Failed to predict: {str(e)}")
         raise Exception(f"Failed to predict: {str(e)}")
 
-def run_predictor(cloudinary_url='https://res.cloudinary.com/djz9qsw5v/raw/upload/v1748064726/base_clientes_w1_fake_gpdjxz.csv', output_dir='media'):
-    """Run the full prediction pipeline with Cloudinary integration."""
+def predict_batch(records, output_dir='media', bundle=None):
+    """Predict for many data points in one vectorized pass through the encoder, scaler and forests."""
+    try:
+        if bundle is None:
+            bundle = model_holder.get(output_dir)
+        le, scaler = bundle.le, bundle.scaler
+
+        input_data = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+        logger.debug(f"Predicting batch of {len(input_data)} data points")
+        if input_data.empty:
+            return []
+        input_data = input_data[bundle.feature_names].copy()
+        input_data['Perfil_Risco'] = le.transform(input_data['Perfil_Risco'])
+
+        colunas_numericas = ['Idade', 'Volume_Investimentos', 'Qtd_Servicos_Contratados', 'Score_Relacionamento']
+        input_data[colunas_numericas] = scaler.transform(input_data[colunas_numericas])
+
+        return bundle.engine.predict_many(input_data.to_numpy(dtype=np.float64))
+    except Exception as e:
+        logger.error(f"Failed to predict batch: {str(e)}")
+        raise Exception(f"Failed to predict batch: {str(e)}")
+
+def run_predictor(cloudinary_url='https://res.cloudinary.com/djz9qsw5v/raw/upload/v1748064726/base_clientes_w1_fake_gpdjxz.csv', output_dir='media', on_stage=None, cache_dir=None, n_jobs=-1, previous=None, full_refit_reason=None, chunked_ingest_mb=None, params=None):
+    """Run the full prediction pipeline with Cloudinary integration.
+
+    ``on_stage`` is called with each name in TRAINING_STAGES as the pipeline reaches it.
+    ``previous`` describes the latest committed run; when the dataset only gained rows since,
+    its forests are grown on the new rows instead of refitted (see plan_training), and when it
+    did not change at all DatasetUnchanged is raised before anything is trained.
+    ``chunked_ingest_mb`` is the CSV size from which the dataset is streamed in chunks.
+    ``params`` maps 'holding'/'churn' to RandomForestClassifier hyperparameters for full refits.
+    Stages are recorded as spans of the active tracer (see tracing.py), or of a new one.
+    """
+    tracer = current_tracer() or Tracer()
+    with tracer.activate(), span('run_predictor'):
+        return _run_pipeline(cloudinary_url, output_dir, on_stage, cache_dir, n_jobs, previous,
+                             full_refit_reason, chunked_ingest_mb, params or {})
+
+def _run_pipeline(cloudinary_url, output_dir, on_stage, cache_dir, n_jobs, previous, full_refit_reason,
+                  chunked_ingest_mb, params):
+    """Body of run_predictor, run with its tracer active."""
     logger.debug("Running predictor pipeline")
     os.makedirs(output_dir, exist_ok=True)
+    on_stage = on_stage or (lambda stage: None)
     
     try:
-        df, le, scaler = load_and_preprocess_data(cloudinary_url, output_dir)
-        
-        report_h, f1_h, matriz_holding_url, importancia_holding_url, relatorio_holding_path, importances_h, prob_h = train_and_evaluate_holding(df, output_dir)
-        report_c, f1_c, matriz_churn_url, importancia_churn_url, importances_c, prob_c = train_and_evaluate_churn(df, output_dir)
+        with span('load_and_preprocess'):
+            X, y, le, scaler, fingerprint, plan = load_and_preprocess_data(
+                cloudinary_url, output_dir, on_stage=on_stage, cache_dir=cache_dir,
+                previous=previous, full_refit_reason=full_refit_reason, chunked_ingest_mb=chunked_ingest_mb
+            )
+
+        # Both targets share one feature matrix and are fitted concurrently.
+        on_stage('fit')
+        with span('fit_total', mode=plan['mode']), ThreadPoolExecutor(max_workers=2) as executor:
+            future_h = executor.submit(in_context(_traced), 'fit_holding', train_and_evaluate_holding, X, y['Abriu_Holding'], output_dir, n_jobs, plan, params.get('holding'))
+            future_c = executor.submit(in_context(_traced), 'fit_churn', train_and_evaluate_churn, X, y['Risco_Churn'], output_dir, n_jobs, plan, params.get('churn'))
+            report_h, f1_h, matrix_h, relatorio_holding_path, importances_h, prob_h = future_h.result()
+            report_c, f1_c, matrix_c, importances_c, prob_c = future_c.result()
         
         joblib.dump(importances_h, os.path.join(output_dir, 'importances_holding.pkl'))
         joblib.dump(importances_c, os.path.join(output_dir, 'importances_churn.pkl'))
+        holdout = plan['test'] if plan['mode'] == 'incremental' else next(holdout_folds(len(X)))[1]
+        np.save(os.path.join(output_dir, HOLDOUT_FILE), np.sort(holdout))
         
-        total_predictions = len(df)
-        holding_conversions = df['Abriu_Holding'].sum()
-        medio_risk_clients = (df['Risco_Churn'] == 1).sum()
+        total_predictions = len(X)
+        holding_conversions = y['Abriu_Holding'].sum()
+        medio_risk_clients = (y['Risco_Churn'] == 1).sum()
         model_accuracy = (report_h['accuracy'] + report_c['accuracy']) / 2 * 100
         
         distribution_data = [
-            {'label': 'Baixo Risco', 'value': (df['Risco_Churn'] == 0).mean() * 100, 'color': '#22c55e'},
-            {'label': 'Médio Risco', 'value': (df['Risco_Churn'] == 1).mean() * 100, 'color': '#eab308'},
+            {'label': 'Baixo Risco', 'value': (y['Risco_Churn'] == 0).mean() * 100, 'color': '#22c55e'},
+            {'label': 'Médio Risco', 'value': (y['Risco_Churn'] == 1).mean() * 100, 'color': '#eab308'},
         ]
         holding_data = [
-            {'label': 'Sim', 'value': df['Abriu_Holding'].mean() * 100, 'color': '#3b82f6'},
-            {'label': 'Não', 'value': (1 - df['Abriu_Holding'].mean()) * 100, 'color': '#9ca3af'},
+            {'label': 'Sim', 'value': y['Abriu_Holding'].mean() * 100, 'color': '#3b82f6'},
+            {'label': 'Não', 'value': (1 - y['Abriu_Holding'].mean()) * 100, 'color': '#9ca3af'},
         ]
         
-        # Create RandomForestClassifier instances for confusion matrix
+        # Reload the persisted forests so the compiled export is checked against what is served
         rf_h = joblib.load(os.path.join(output_dir, 'rf_holding.pkl'))
         rf_c = joblib.load(os.path.join(output_dir, 'rf_churn.pkl'))
         
+        on_stage('export')
+        with span('export'):
+            with span('export_forests'):
+                export_compiled_forests(rf_h, rf_c, output_dir)
+            with span('verify_forests'):
+                verify_compiled_forests(X, rf_h, rf_c, output_dir)
+        timings = current_tracer().durations('load_and_preprocess', 'fit_holding', 'fit_churn', 'fit_total', 'export')
+        logger.debug(f"Training stage timings (s): {timings}")
+
         return {
             'holding_report': report_h,
             'holding_f1_score': f1_h,
             'churn_report': report_c,
             'churn_f1_score': f1_c,
-            'matriz_holding_url': matriz_holding_url,
-            'matriz_churn_url': matriz_churn_url,
-            'importancia_holding_url': importancia_holding_url,
-            'importancia_churn_url': importancia_churn_url,
+            'charts': chart_data(matrix_h, importances_h, matrix_c, importances_c),
             'relatorio_holding_url': relatorio_holding_path,
+            'dataset_fingerprint': fingerprint,
+            'training': {
+                'mode': plan['mode'],
+                'reason': plan['reason'],
+                'n_rows': plan['n_rows'],
+                'base_rows': plan['base_rows'],
+                'n_new_trees': plan.get('n_new_trees', 0),
+                'n_trees': len(rf_h.estimators_),
+                'params': params,
+            },
+            'timings': timings,
             'metrics': {
                 'totalPredictions': total_predictions,
                 'holdingConversions': holding_conversions,
                 'highRiskClients': medio_risk_clients,
                 'modelAccuracy': model_accuracy,
+                # Filled in from the run history when the run is committed (registry.execute_run)
                 'trends': {
                     'predictions': 0.0,
                     'conversions': 0.0,
@@ -266,8 +470,8 @@ def run_predictor(cloudinary_url='https://res.cloudinary.com/djz9qsw5v/raw/uploa
                     },
                     'accuracy': report_c['accuracy']
                 },
-                'holdingMatrix': confusion_matrix(df['Abriu_Holding'], rf_h.predict(df.drop(['Abriu_Holding', 'Risco_Churn', 'Id'], axis=1)), labels=[0, 1]).tolist(),
-                'churnMatrix': confusion_matrix(df['Risco_Churn'], rf_c.predict(df.drop(['Abriu_Holding', 'Risco_Churn', 'Id'], axis=1)), labels=[0, 1]).tolist(),
+                'holdingMatrix': matrix_h.tolist(),
+                'churnMatrix': matrix_c.tolist(),
                 'featureImportance': [{'feature': k, 'importance': v} for k, v in importances_h.items()]
             },
             'stats': {
@@ -277,6 +481,8 @@ def run_predictor(cloudinary_url='https://res.cloudinary.com/djz9qsw5v/raw/uploa
                 'highRiskChurn': medio_risk_clients
             }
         }
+    except DatasetUnchanged:
+        raise
     except Exception as e:
         logger.error(f"Error in run_predictor: {str(e)}")
         raise
\ No newline at end of file
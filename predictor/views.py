@@ -1,27 +1,55 @@
-from rest_framework import permissions
+from rest_framework import exceptions, generics, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .v2churn_predictor import run_predictor, predict_single
-from .serializers import PredictionSerializer
-import os
-from django.conf import settings
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
+from django.http import FileResponse, Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from . import services
+from .registry import get_latest_run, get_latest_snapshot
+from .trends import DEFAULT_WINDOW, compute_trends, parse_window
+from .constants import SNAPSHOT_SECTIONS
+from .jobs import enqueue_training
+from .charts import CHART_NAMES, chart_urls, get_chart
+from .models import TrainingRun
+from .serializers import PredictionSerializer, TrainingRunSerializer
 import logging
 
 
 logger = logging.getLogger(__name__)
 
+NO_MODEL_ERROR = 'No trained model available. Run the training job first.'
+
+def check_access(view_class, request):
+    """Run view_class's authentication and permission checks on a plain Django request.
+
+    Returns None when the request may proceed, otherwise the (status, body) the DRF view would
+    have answered with, so the async views enforce exactly the same rules as their sync twins.
+    """
+    view = view_class()
+    view.args, view.kwargs, view.format_kwarg = (), {}, None
+    view.request = view.initialize_request(request)
+    try:
+        view.perform_authentication(view.request)
+        view.check_permissions(view.request)
+    except exceptions.APIException as exc:
+        response = view.handle_exception(exc)
+        return response.status_code, response.data
+    return None
+
 class PredictorView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
         logger.debug("Processing GET request for /api/predict/")
         try:
-            result = run_predictor(
-                cloudinary_url='https://res.cloudinary.com/djz9qsw5v/raw/upload/v1748064726/base_clientes_w1_fake_gpdjxz.csv',
-                output_dir=settings.MEDIA_ROOT
-            )
-            serializer = PredictionSerializer(result)
+            run = get_latest_run()
+            if run is None:
+                return Response({'error': NO_MODEL_ERROR}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            snapshot = run.snapshot
+            sections = {section: getattr(snapshot, section) for section in SNAPSHOT_SECTIONS}
+            serializer = PredictionSerializer({**run.payload, **sections, **chart_urls(run, request)})
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"Error in PredictorView GET: {str(e)}")
@@ -30,54 +58,154 @@ class PredictorView(APIView):
     def post(self, request):
         logger.debug("Processing POST request for /api/predict/")
         try:
+            run = get_latest_run()
+            if run is None:
+                return Response({'error': NO_MODEL_ERROR}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
             data = request.data
-            result = predict_single(data, output_dir=settings.MEDIA_ROOT)
-            return Response(result, status=status.HTTP_200_OK)
+            result, version = services.predict(data, run)
+            return Response(result, status=status.HTTP_200_OK, headers={'X-Model-Version': version})
         except Exception as e:
             logger.error(f"Error in PredictorView POST: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class MetricsView(APIView):
+class BatchPredictorView(APIView):
     permission_classes = [permissions.AllowAny]
+    parser_classes = [JSONParser, MultiPartParser, FormParser]
 
-    def get(self, request):
-        logger.debug("Processing GET request for /api/metrics/")
+    def post(self, request):
+        logger.debug("Processing POST request for /api/predict/batch/")
         try:
-            result = run_predictor(
-                cloudinary_url='https://res.cloudinary.com/djz9qsw5v/raw/upload/v1748064726/base_clientes_w1_fake_gpdjxz.csv',
-                output_dir=settings.MEDIA_ROOT
-            )
-            return Response(result['metrics'], status=status.HTTP_200_OK)
+            run = get_latest_run()
+            if run is None:
+                return Response({'error': NO_MODEL_ERROR}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            if 'file' in request.FILES:
+                records = services.read_csv(request.FILES['file'])
+            elif isinstance(request.data, list):
+                records = request.data
+            else:
+                return Response(
+                    {'error': 'Send a JSON array of clients or a CSV upload in the "file" field.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            bundle = services.get_bundle(run.artifacts_dir)
+            result = services.predict_batch(records, bundle)
+            return Response(result, status=status.HTTP_200_OK, headers={'X-Model-Version': bundle.version})
         except Exception as e:
-            logger.error(f"Error in MetricsView GET: {str(e)}")
+            logger.error(f"Error in BatchPredictorView POST: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class PerformanceView(APIView):
+class TrainingJobView(APIView):
+    # A committed run becomes the model everyone is served, so only staff may train, and always
+    # on PREDICTOR_DATASET_URL rather than a client-supplied URL.
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        logger.debug("Processing POST request for /api/predict/train/")
+        try:
+            run = enqueue_training()
+            return Response(TrainingRunSerializer(run).data, status=status.HTTP_202_ACCEPTED)
+        except Exception as e:
+            logger.error(f"Error in TrainingJobView POST: {str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class TrainingJobDetailView(generics.RetrieveAPIView):
+    queryset = TrainingRun.objects.select_related('snapshot')
+    serializer_class = TrainingRunSerializer
+    permission_classes = [permissions.AllowAny]
+    lookup_field = 'id'
+
+class ChartView(APIView):
     permission_classes = [permissions.AllowAny]
 
+    def get(self, request, id, name):
+        logger.debug(f"Processing GET request for chart {name} of run {id}")
+        run = generics.get_object_or_404(TrainingRun, id=id, status='committed')
+        if name not in CHART_NAMES or 'charts' not in run.payload:
+            raise Http404
+        try:
+            response = FileResponse(open(get_chart(run, name), 'rb'), content_type='image/png')
+            # A run's charts never change, so clients may cache them indefinitely.
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+            return response
+        except Exception as e:
+            logger.error(f"Error in ChartView GET: {str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ChartDataView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        logger.debug("Processing GET request for /api/predict/charts/")
+        run = get_latest_run()
+        if run is None:
+            return Response({'error': NO_MODEL_ERROR}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        # Runs trained before lazy charts have no chart data, only the uploaded URLs.
+        if 'charts' not in run.payload:
+            raise Http404
+        return Response({'version': run.id, 'charts': run.payload['charts']}, status=status.HTTP_200_OK)
+
+class SnapshotView(APIView):
+    """Serve one section of the latest run's MetricsSnapshot with conditional GET support.
+
+    Snapshots never change once written, so the ETag is derived from the run and section and
+    polling clients get a bodyless 304 until a new model is committed.
+    """
+    permission_classes = [permissions.AllowAny]
+    section = None
+
     def get(self, request):
-        logger.debug("Processing GET request for /api/model-performance/")
+        logger.debug(f"Processing GET request for {request.path}")
         try:
-            result = run_predictor(
-                cloudinary_url='https://res.cloudinary.com/djz9qsw5v/raw/upload/v1748064726/base_clientes_w1_fake_gpdjxz.csv',
-                output_dir=settings.MEDIA_ROOT
-            )
-            return Response(result['performance'], status=status.HTTP_200_OK)
+            snapshot = get_latest_snapshot(self.section)
+            if snapshot is None:
+                return Response({'error': NO_MODEL_ERROR}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            etag = quote_etag(f"{snapshot.run_id}-{self.section}")
+            last_modified = int(snapshot.criado_em.timestamp())
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = Response(getattr(snapshot, self.section), status=status.HTTP_200_OK)
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            response['Cache-Control'] = 'public, no-cache'
+            return response
         except Exception as e:
-            logger.error(f"Error in PerformanceView GET: {str(e)}")
+            logger.error(f"Error in {type(self).__name__} GET: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class StatsView(APIView):
+class MetricsView(SnapshotView):
+    section = 'metrics'
+
+class PerformanceView(SnapshotView):
+    section = 'performance'
+
+class StatsView(SnapshotView):
+    section = 'stats'
+
+class TrendsView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
-        logger.debug("Processing GET request for /api/stats/")
+        logger.debug("Processing GET request for /api/metrics/trends/")
+        labels = [
+            label for value in request.query_params.getlist('window') or [DEFAULT_WINDOW]
+            for label in value.split(',') if label.strip()
+        ]
         try:
-            result = run_predictor(
-                cloudinary_url='https://res.cloudinary.com/djz9qsw5v/raw/upload/v1748064726/base_clientes_w1_fake_gpdjxz.csv',
-                output_dir=settings.MEDIA_ROOT
-            )
-            return Response(result['stats'], status=status.HTTP_200_OK)
+            windows = {label.strip(): parse_window(label) for label in labels}
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            trends = {label: compute_trends(window) for label, window in windows.items()}
+            if any(trend is None for trend in trends.values()):
+                return Response({'error': NO_MODEL_ERROR}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            return Response({'windows': trends}, status=status.HTTP_200_OK)
         except Exception as e:
-            logger.error(f"Error in StatsView GET: {str(e)}")
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            logger.error(f"Error in TrendsView GET: {str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ModelStatusView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        logger.debug("Processing GET request for /api/predict/model/")
+        return Response(services.model_status(), status=status.HTTP_200_OK)
\ No newline at end of file
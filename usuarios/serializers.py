@@ -22,6 +22,31 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class UserScoreSerializer(UserSerializer):
+    """UserSerializer plus the stored churn/holding score, for the admin user list only.
+
+    Expects the queryset to select_related('score'), as UserListView does, so listing users
+    costs one query rather than one per user.
+    """
+    score = serializers.SerializerMethodField()
+
+    def get_score(self, obj):
+        # Stored by `manage.py score_all`; users scored before it ran have no score yet.
+        score = getattr(obj, 'score', None)
+        if score is None:
+            return None
+        return {
+            'prob_holding': score.prob_holding,
+            'prob_churn': score.prob_churn,
+            'abriu_holding': score.abriu_holding,
+            'risco_churn': score.risco_churn,
+            'atualizado_em': score.atualizado_em,
+        }
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ['score']
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password_confirm = serializers.CharField(write_only=True, required=True)
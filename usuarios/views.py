@@ -3,8 +3,8 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.exceptions import TokenError
 from .models import CustomUser
-from .serializers import UserSerializer, RegisterSerializer
-from django.db.models import Q
+from .serializers import UserSerializer, UserScoreSerializer, RegisterSerializer
+from django.db.models import F, Q
 from rest_framework import status
 import datetime
 from django.utils.dateparse import parse_date
@@ -15,11 +15,17 @@ class IsAdminUser(permissions.BasePermission):
 
 class UserListView(generics.ListAPIView):
     queryset = CustomUser.objects.all()
-    serializer_class = UserSerializer
+    serializer_class = UserScoreSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    # Sort keys backed by the indexed columns of predictor.ClientScore.
+    SCORE_ORDERING = {
+        'prob_churn': 'score__prob_churn',
+        'prob_holding': 'score__prob_holding',
+    }
+
     def get_queryset(self):
-        queryset = CustomUser.objects.all()
+        queryset = CustomUser.objects.select_related('score')
         search = self.request.query_params.get('search', '')
         status = self.request.query_params.get('status', 'all')
         data_inicio = self.request.query_params.get('data_inicio', '')
@@ -48,6 +54,24 @@ class UserListView(generics.ListAPIView):
             if end_date:
                 queryset = queryset.filter(data_registro__date__lte=end_date)
 
+        # Risk filters and ordering
+        risco = self.request.query_params.get('risco', '')
+        churn_min = self.request.query_params.get('churn_min', '')
+        ordering = self.request.query_params.get('ordering', '')
+        if risco in ('baixo', 'medio'):
+            queryset = queryset.filter(score__risco_churn='Baixo' if risco == 'baixo' else 'Médio')
+        if churn_min:
+            try:
+                queryset = queryset.filter(score__prob_churn__gte=float(churn_min))
+            except ValueError:
+                pass
+        if ordering.lstrip('-') in self.SCORE_ORDERING:
+            field = F(self.SCORE_ORDERING[ordering.lstrip('-')])
+            if ordering.startswith('-'):
+                queryset = queryset.order_by(field.desc(nulls_last=True))
+            else:
+                queryset = queryset.order_by(field.asc(nulls_last=True))
+
         return queryset
 
 